@@ -0,0 +1,58 @@
+"""
+Compares two result files written by benchmarks/suite.py, for example from two commits.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+
+Prints the change in rows/sec and peak RSS for every (metric, rows) present in both files and exits with status 1
+when any throughput drops, or any peak RSS grows, by more than --threshold.
+"""
+import argparse
+import json
+import sys
+
+
+
+def load(path: str) -> tuple[dict, dict[tuple[str, int], dict]]:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data["environment"], {(result["metric"], result["rows"]): result for result in data["results"]}
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    baseline_env, baseline = load(args.baseline)
+    candidate_env, candidate = load(args.candidate)
+    print(f"baseline:  {baseline_env.get('commit')} ({baseline_env.get('timestamp')})")
+    print(f"candidate: {candidate_env.get('commit')} ({candidate_env.get('timestamp')})")
+    if baseline_env.get("platform") != candidate_env.get("platform") or baseline_env.get("cpu_count") != candidate_env.get("cpu_count"):
+        print("warning: the results come from different machines")
+
+    regressions = []
+    print(f"{'metric':<13} {'rows':>8} {'rows/s':>12} {'change':>8} {'peak MB':>9} {'change':>8}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        speed = after["rows_per_sec"] / before["rows_per_sec"] - 1
+        memory = after["peak_rss_mb"] / before["peak_rss_mb"] - 1
+        flag = ""
+        if speed < -args.threshold or memory > args.threshold:
+            regressions.append(key)
+            flag = "  REGRESSION"
+        print(f"{key[0]:<13} {key[1]:>8,} {after['rows_per_sec']:>12,.0f} {speed:>+8.1%} {after['peak_rss_mb']:>9,.0f} {memory:>+8.1%}{flag}")
+
+    missing = sorted(baseline.keys() ^ candidate.keys())
+    if missing:
+        print(f"only in one file: {missing}")
+
+    sys.exit(1 if regressions else 0)
+
+
+
+if __name__ == "__main__":
+    main()
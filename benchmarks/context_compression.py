@@ -0,0 +1,151 @@
+"""
+Prompt tokens saved and score drift of PrometheusScore with relevance-based context compression (`context_budget`).
+
+Usage:
+    python benchmarks/context_compression.py [--rows 200] [--passages 40 160] [--budget 1024] [--chunk-tokens 128]
+    python benchmarks/context_compression.py --judge prometheus-eval/prometheus-7b-v2.0 --judge-url http://judge:8000/v1 \
+        --bi-encoder sentence-transformers/paraphrase-multilingual-mpnet-base-v2
+
+The fixture set is generated locally: every row asks about one fictitious city, whose passage (the evidence) is hidden among
+distractor passages about other cities, and the prediction answers from it. Each row is judged twice, with the full context
+and with the compressed one, and the report gives the prompt tokens of both runs, the compression time and the drift of the
+scores (mean absolute change and share of changed scores).
+
+Without --judge, the tiny local checkpoints of benchmarks/suite.py are used and an evidence judge answers offline: it gives
+9 when the evidence passage of the row is still in the prompt and 4 otherwise, so the drift measures lost evidence. The tiny
+bi-encoder is randomly initialized, so pass a real --bi-encoder for meaningful rankings.
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from eval_llms import OpenAICompatibleBackend, PrometheusScore, StageSummary, instrument
+from eval_llms.judges import Generation, JudgeBackend
+from eval_llms.prometheus import load_tokenizer
+from suite import build_checkpoints
+
+
+
+SYLLABLES = ["val", "mor", "ten", "ria", "cas", "lun", "dor", "bel", "sa", "qui", "ron", "fa", "mi", "ler", "gos", "tal"]
+RIVERS = ["Ebro", "Tajo", "Duero", "Segura", "Júcar", "Miño", "Genil", "Turia"]
+SECTORS = ["la pesca", "el turismo", "la minería", "la agricultura", "el comercio", "la industria textil", "el vino"]
+MONTHS = ["enero", "marzo", "mayo", "julio", "agosto", "octubre", "diciembre"]
+
+
+
+def make_fixtures(rows: int, passages: tuple[int, int], seed: int = 0) -> dict[str, list]:
+    rng = np.random.default_rng(seed)
+    cities = set()
+
+    # Every row asks about a different city and its distractors never mention a city asked about.
+    def city(asked: bool = False) -> str:
+        while True:
+            name = "".join(rng.choice(SYLLABLES, 3)).capitalize()
+            if name not in cities:
+                if asked:
+                    cities.add(name)
+                return name
+
+    def passage(name: str) -> tuple[str, dict]:
+        facts = {
+            "people": int(rng.integers(10, 900)), "river": rng.choice(RIVERS), "sector": rng.choice(SECTORS), "month": rng.choice(MONTHS)
+        }
+        text = (
+            f"{name} es una ciudad de {facts['people']} mil habitantes situada junto al río {facts['river']}. "
+            f"Su economía depende sobre todo de {facts['sector']}. La fiesta mayor de {name} se celebra en {facts['month']}."
+        )
+        return text, facts
+
+    data = {"predictions": [], "references": [], "contexts": [], "previous_conversations": [], "evidence": []}
+    names = [city(asked=True) for _ in range(rows)]
+    for name in names:
+        evidence, facts = passage(name)
+        documents = [passage(city())[0] for _ in range(int(rng.integers(passages[0], passages[1] + 1)) - 1)]
+        documents.insert(int(rng.integers(0, len(documents) + 1)), evidence)
+        data["contexts"].append("\n\n".join(documents))
+        data["evidence"].append(evidence)
+        data["previous_conversations"].append([{"role": "user", "content": f"¿Cuántos habitantes tiene {name} y de qué vive?"}])
+        data["predictions"].append(f"{name} tiene {facts['people']} mil habitantes y su economía depende de {facts['sector']}.")
+        data["references"].append(f"{name} tiene unos {facts['people']} mil habitantes y vive principalmente de {facts['sector']}.")
+    return data
+
+
+
+def evidence_judge(model_name: str, evidence: list[str]) -> JudgeBackend:
+    tokenizer = load_tokenizer(model_name)
+
+    class EvidenceJudge(JudgeBackend):
+        def __init__(self):
+            self.model_name = model_name
+
+        def generate(self, prompts: list[str], sampling_params: dict) -> list[Generation]:
+            lengths = [len(ids) for ids in tokenizer(prompts, add_special_tokens=False)["input_ids"]]
+            found = [any(passage in prompt for passage in evidence) for prompt in prompts]
+            return [
+                Generation("Fiel a la documentación. Puntuación: 9" if hit else "Sin apoyo documental. Puntuación: 4", length, 8)
+                for hit, length in zip(found, lengths)
+            ]
+
+    return EvidenceJudge()
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--passages", type=int, nargs=2, default=[40, 160])
+    parser.add_argument("--budget", type=int, default=1024)
+    parser.add_argument("--chunk-tokens", type=int, default=128)
+    parser.add_argument("--bi-encoder", default=None)
+    parser.add_argument("--judge", default=None)
+    parser.add_argument("--judge-url", default=None)
+    args = parser.parse_args()
+
+    data = make_fixtures(args.rows, tuple(args.passages))
+    if args.judge is None:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        paths = build_checkpoints(os.path.join(tempfile.gettempdir(), "eval_llms_benchmark_models"))
+        args.judge = paths["causal_lm"]
+        args.bi_encoder = args.bi_encoder or paths["bi_encoder"]
+        backend = evidence_judge(args.judge, data["evidence"])
+    else:
+        backend = OpenAICompatibleBackend(args.judge_url, args.judge) if args.judge_url else None
+
+    metric = PrometheusScore()
+    kwargs = dict(
+        model_name=args.judge, predictions=data["predictions"], references=data["references"], contexts=data["contexts"],
+        previous_conversations=data["previous_conversations"], backend=backend
+    )
+    if args.bi_encoder:
+        kwargs["compression_model"] = args.bi_encoder
+
+    runs = {}
+    for name, budget in [("full", None), ("compressed", args.budget)]:
+        summary = StageSummary()
+        start = time.perf_counter()
+        with instrument(summary):
+            scores, stats = metric.score(**kwargs, context_budget=budget, chunk_tokens=args.chunk_tokens, return_stats=True)
+        stages = {row["stage"]: row for row in summary.summary() if row["metric"] == "PrometheusScore"}
+        runs[name] = {
+            "scores": np.array(scores, dtype=float),
+            "prompt_tokens": int(stages["generation"].get("prompt_tokens", 0)),
+            "compression_seconds": stages.get("context_compression", {}).get("seconds", 0.0),
+            "seconds": time.perf_counter() - start,
+            "stats": stats,
+        }
+
+    full, compressed = runs["full"], runs["compressed"]
+    drift = np.abs(compressed["scores"] - full["scores"])
+    saved = 1 - compressed["prompt_tokens"] / full["prompt_tokens"]
+    print(f"{args.rows} rows, context budget {args.budget} tokens, chunks of {args.chunk_tokens} tokens")
+    print(f"  prompt tokens:     {full['prompt_tokens']:>12,} -> {compressed['prompt_tokens']:,} ({saved:.1%} saved)")
+    print(f"  compressed rows:   {compressed['stats']['compressed']:>12,} ({compressed['stats']['context_tokens_saved']:,} context tokens removed)")
+    print(f"  compression time:  {compressed['compression_seconds']:>12.2f} s")
+    print(f"  mean score:        {np.nanmean(full['scores']):>12.2f} -> {np.nanmean(compressed['scores']):.2f}")
+    print(f"  score drift:       {np.nanmean(drift):>12.2f} mean abs, {np.mean(drift > 0):.1%} of rows changed")
+
+
+
+if __name__ == "__main__":
+    main()
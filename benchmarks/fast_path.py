@@ -0,0 +1,63 @@
+"""
+Per-call latency of `Metric.compute()` against the in-memory `Metric.score()` fast path.
+
+Usage:
+    python benchmarks/fast_path.py [--rows 10 1000 100000] [--calls 20] [--bi-encoder PATH]
+
+`compute()` writes every batch to an Arrow cache file and reads it back before scoring, which dominates small
+calls. `score()` hands the lists straight to the metric. Pass a local sentence transformer with `--bi-encoder`
+to also time BiEncoderScore.
+"""
+import argparse
+import time
+import numpy as np
+from eval_llms import Accuracy, BiEncoderScore
+
+
+
+def make_rows(rows: int, seed: int = 0) -> tuple[list[str], list[str]]:
+    rng = np.random.default_rng(seed)
+    letters = np.array(list("ABCDE"))
+    return letters[rng.integers(0, 5, rows)].tolist(), letters[rng.integers(0, 5, rows)].tolist()
+
+
+
+def latency(function, calls: int) -> float:
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1_000, 100_000])
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--bi-encoder", default=None)
+    args = parser.parse_args()
+
+    metrics = [("Accuracy", Accuracy(), {})]
+    if args.bi_encoder:
+        metrics.append(("BiEncoderScore", BiEncoderScore(), {"model_name": args.bi_encoder}))
+
+    for name, metric, kwargs in metrics:
+        for rows in args.rows:
+            predictions, references = make_rows(rows)
+            # Warm up model loading and evaluate's lazy setup before timing.
+            metric.score(predictions[:2], references[:2], **kwargs)
+            metric.compute(predictions=predictions[:2], references=references[:2], **kwargs)
+
+            compute_time = latency(lambda: metric.compute(predictions=predictions, references=references, **kwargs), args.calls)
+            score_time = latency(lambda: metric.score(predictions, references, **kwargs), args.calls)
+
+            print(f"{name} rows={rows:,}")
+            print(f"  compute(): {compute_time * 1e3:>10.2f} ms/call")
+            print(f"  score():   {score_time * 1e3:>10.2f} ms/call  ({compute_time / score_time:.1f}x)")
+
+
+
+if __name__ == "__main__":
+    main()
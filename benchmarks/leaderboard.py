@@ -0,0 +1,55 @@
+"""
+Ranking K candidate models: K separate metric calls against one `leaderboard()` call.
+
+Usage:
+    python benchmarks/leaderboard.py [--candidates 20] [--rows 1000] [--model PATH] [--metric bi_encoder|sas]
+
+Without --model, the tiny local checkpoints of benchmarks/suite.py are built and used, so the comparison runs offline.
+Every candidate answers the same references, which the separate calls encode once per candidate and the leaderboard
+encodes once in total.
+"""
+import argparse
+import os
+import tempfile
+import time
+from eval_llms import BiEncoderScore, SemanticAnswerSimilarity, leaderboard
+from suite import build_checkpoints, make_rows
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--candidates", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--metric", default="bi_encoder", choices=["bi_encoder", "sas"])
+    args = parser.parse_args()
+
+    if args.model is None:
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        paths = build_checkpoints(os.path.join(tempfile.gettempdir(), "eval_llms_benchmark_models"))
+        args.model = paths["bi_encoder" if args.metric == "bi_encoder" else "cross_encoder"]
+
+    metric = BiEncoderScore() if args.metric == "bi_encoder" else SemanticAnswerSimilarity()
+    references = make_rows(args.rows)["references"]
+    candidates = {f"model-{k}": make_rows(args.rows, seed=k + 1)["predictions"] for k in range(args.candidates)}
+    metric.score(references[:2], references[:2], model_name=args.model)
+
+    start = time.perf_counter()
+    for predictions in candidates.values():
+        metric.score(predictions, references, model_name=args.model)
+    separate = time.perf_counter() - start
+
+    start = time.perf_counter()
+    leaderboard(metric, candidates, references, model_name=args.model)
+    single = time.perf_counter() - start
+
+    total_rows = args.rows * args.candidates
+    print(f"{args.candidates} candidates x {args.rows} rows ({args.metric})")
+    print(f"  separate calls:   {total_rows / separate:>10,.0f} rows/s")
+    print(f"  leaderboard call: {total_rows / single:>10,.0f} rows/s  ({separate / single:.2f}x)")
+
+
+
+if __name__ == "__main__":
+    main()
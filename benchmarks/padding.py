@@ -0,0 +1,66 @@
+"""
+Padding overhead of fixed-size batches in input order versus token-budget batches.
+
+Usage:
+    python benchmarks/padding.py [--rows 20000] [--batch-size 64] [--max-tokens-per-batch 8192] [--model MODEL]
+
+Without --model, lengths are drawn from a mix of one-word answers and multi-paragraph responses. With --model, the
+texts are tokenized with that sentence transformer and both batching modes are also timed end to end, along with the
+extra tokenizer pass that token-budget batching spends on measuring lengths (the model tokenizes every batch again). Recent
+sentence-transformers releases sort each encode call by character length, so the length-sorted fixed batches are the
+closest estimate of what a plain `batch_size` call pads.
+"""
+import argparse
+import time
+import numpy as np
+from eval_llms.batching import fixed_size_batches, padding_fraction, token_budget_batches, token_lengths
+
+
+
+def synthetic_texts(rows: int, seed: int = 0) -> list[str]:
+    rng = np.random.default_rng(seed)
+    words = ["respuesta", "correcta", "el", "modelo", "documento", "sol", "capital", "Francia", "energía", "núcleo"]
+    lengths = np.where(rng.random(rows) < 0.6, rng.integers(1, 4, rows), rng.integers(40, 250, rows))
+    return [" ".join(rng.choice(words, length)) for length in lengths]
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-tokens-per-batch", type=int, default=8192)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    texts = synthetic_texts(args.rows)
+    if args.model:
+        from eval_llms.biencoder import encode_texts, load_sentence_transformer
+
+        model = load_sentence_transformer(args.model, "cpu")
+        start = time.perf_counter()
+        lengths = token_lengths(model.tokenizer, texts, max_length=model.max_seq_length)
+        length_seconds = time.perf_counter() - start
+    else:
+        lengths = np.array([len(text.split()) + 2 for text in texts])
+
+    fixed = fixed_size_batches(len(texts), args.batch_size)
+    budget = token_budget_batches(lengths, args.max_tokens_per_batch)
+    print(f"rows={len(texts)} tokens={int(lengths.sum())}")
+    sorted_fixed = [np.argsort(-lengths, kind="stable")[batch] for batch in fixed]
+    print(f"fixed batch_size={args.batch_size}, input order: batches={len(fixed)} padding={padding_fraction(lengths, fixed):.1%}")
+    print(f"fixed batch_size={args.batch_size}, length sorted: batches={len(fixed)} padding={padding_fraction(lengths, sorted_fixed):.1%}")
+    print(f"token budget={args.max_tokens_per_batch}: batches={len(budget)} padding={padding_fraction(lengths, budget):.1%}")
+
+    if args.model:
+        for name, kwargs in (("fixed", {"batch_size": args.batch_size}), ("token budget", {"max_tokens_per_batch": args.max_tokens_per_batch})):
+            start = time.perf_counter()
+            encode_texts(model, texts, **kwargs)
+            seconds = time.perf_counter() - start
+            print(f"{name}: {len(texts) / seconds:.0f} rows/s")
+        print(f"length tokenizer pass: {length_seconds:.2f} s ({length_seconds / seconds:.1%} of the token budget run)")
+
+
+
+if __name__ == "__main__":
+    main()
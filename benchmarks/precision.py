@@ -0,0 +1,87 @@
+"""
+Accuracy versus memory of the compact embedding precisions against the float32 cosine baseline.
+
+Usage:
+    python benchmarks/precision.py [--rows 100000] [--dim 768] [--chunk-size 65536]
+    python benchmarks/precision.py --model sentence-transformers/paraphrase-multilingual-mpnet-base-v2 --data eval.jsonl
+
+Without --model, embeddings are synthetic: anisotropic Gaussian vectors with a shared mean component (like real
+sentence embeddings) and pairs whose correlation is drawn uniformly, so cosines cover the whole [0, 1] range. With
+--model, the prediction/reference columns of --data are encoded once and every precision compresses those vectors.
+
+Reports bytes per stored vector, the mean and maximum absolute error of the pair similarity and the Spearman rank
+correlation with the float32 scores (how well a ranking of answers survives).
+"""
+import argparse
+import json
+import time
+import numpy as np
+from eval_llms.precision import PRECISIONS, CompactEmbeddings
+
+
+
+def synthetic_pairs(rows: int, dim: int, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    scale = rng.gamma(2.0, 0.5, dim).astype(np.float32)
+    mean = rng.normal(0, 0.5, dim).astype(np.float32)
+    left = rng.normal(0, 1, (rows, dim)).astype(np.float32)
+    noise = rng.normal(0, 1, (rows, dim)).astype(np.float32)
+    rho = rng.uniform(0, 1, (rows, 1)).astype(np.float32)
+    right = rho * left + np.sqrt(1 - rho ** 2) * noise
+    return left * scale + mean, right * scale + mean
+
+
+
+def model_pairs(model_name: str, path: str) -> tuple[np.ndarray, np.ndarray]:
+    from sentence_transformers import SentenceTransformer
+
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    model = SentenceTransformer(model_name)
+    left = model.encode([row["prediction"] for row in rows], convert_to_numpy=True)
+    right = model.encode([row["reference"] for row in rows], convert_to_numpy=True)
+    return left, right
+
+
+
+def spearman(a: np.ndarray, b: np.ndarray) -> float:
+    ranks_a = np.argsort(np.argsort(a)).astype(np.float64)
+    ranks_b = np.argsort(np.argsort(b)).astype(np.float64)
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--data", default=None)
+    args = parser.parse_args()
+
+    left, right = model_pairs(args.model, args.data) if args.model else synthetic_pairs(args.rows, args.dim)
+    rows = len(left)
+    baseline = np.einsum("ij,ij->i", left, right) / (np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1))
+    index = np.arange(rows)
+
+    print(f"rows={rows:,} dim={left.shape[1]}")
+    print(f"{'precision':<10} {'bytes/vector':>12} {'memory':>8} {'mean abs err':>13} {'max abs err':>12} {'spearman':>9} {'seconds':>8}")
+    for precision in PRECISIONS:
+        start = time.perf_counter()
+        compact = CompactEmbeddings(2 * rows, precision)
+        compact.set(0, left)
+        compact.set(rows, right)
+        similarities = compact.pair_similarity(index, index + rows, args.chunk_size)
+        seconds = time.perf_counter() - start
+
+        errors = np.abs(similarities - baseline)
+        print(
+            f"{precision:<10} {compact.nbytes / (2 * rows):>12,.1f} {compact.nbytes / (2 * rows * left.shape[1] * 4):>8.1%} "
+            f"{errors.mean():>13.5f} {errors.max():>12.5f} {spearman(similarities, baseline):>9.5f} {seconds:>8.2f}"
+        )
+
+
+
+if __name__ == "__main__":
+    main()
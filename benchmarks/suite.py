@@ -0,0 +1,227 @@
+"""
+Offline benchmark suite: rows/sec, per-call latency and peak RSS of every metric at several dataset sizes.
+
+Usage:
+    python benchmarks/suite.py [--sizes 100 1000 10000] [--calls 5] [--metrics accuracy bi_encoder ...]
+                               [--models-dir DIR] [--output results.json]
+    python benchmarks/compare.py baseline.json results.json
+
+Tiny randomly initialized checkpoints (sentence transformer, cross-encoder and a causal LM with a chat template) are
+built into --models-dir on first use, so the suite never touches the network and its numbers track the library's own
+overhead (deduplication, batching, templating, parsing, ...) rather than the cost of a large model. PrometheusScore is
+measured on its prompt building and score parsing path: generation is answered by a canned in-process judge.
+
+Every metric runs in its own spawned process, over the sizes in increasing order, so the peak RSS reported for a size
+covers the model, evaluate's setup and the largest call so far of that metric only. The first call of each metric is a
+warm-up whose time is reported as `load_seconds` and excluded from the latency.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+
+
+
+METRICS = ["accuracy", "bi_encoder", "sas", "sas_ensemble", "prometheus"]
+CHAT_TEMPLATE = "{% for message in messages %}<|{{ message['role'] }}|>{{ message['content'] }}<|end|>{% endfor %}{% if add_generation_prompt %}<|assistant|>{% endif %}"
+WORDS = [
+    "el", "la", "los", "las", "un", "una", "de", "en", "que", "es", "son", "por", "para", "con", "sol", "cielo", "brilla",
+    "capital", "francia", "parís", "agua", "energía", "modelo", "respuesta", "correcta", "documento", "usuario", "café",
+    "bebida", "popular", "bicicletas", "ecológicas", "ciudad", "río", "montaña", "historia", "ciencia", "datos",
+]
+
+
+
+def build_checkpoints(models_dir: str) -> dict[str, str]:
+    """Builds (once) the tiny checkpoints used by the suite and returns their paths."""
+    paths = {name: os.path.join(models_dir, name) for name in ("bi_encoder", "cross_encoder", "causal_lm")}
+    if all(os.path.exists(os.path.join(path, "done")) for path in paths.values()):
+        return paths
+
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertForSequenceClassification, BertModel, BertTokenizerFast, LlamaConfig, LlamaForCausalLM
+
+    torch.manual_seed(0)
+    os.makedirs(models_dir, exist_ok=True)
+    vocab_file = os.path.join(models_dir, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS + list("abcdefghijklmnopqrstuvwxyzáéíóúñ0123456789.,:")))
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file)
+    bert = dict(vocab_size=len(tokenizer), hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=128, max_position_embeddings=512)
+
+    bert_dir = os.path.join(paths["bi_encoder"], "bert")
+    BertModel(BertConfig(**bert)).save_pretrained(bert_dir)
+    tokenizer.save_pretrained(bert_dir)
+    transformer = models.Transformer(bert_dir, max_seq_length=256)
+    SentenceTransformer(modules=[transformer, models.Pooling(transformer.get_word_embedding_dimension())]).save(paths["bi_encoder"])
+
+    BertForSequenceClassification(BertConfig(**bert, num_labels=1, architectures=["BertForSequenceClassification"])).save_pretrained(paths["cross_encoder"])
+    tokenizer.save_pretrained(paths["cross_encoder"])
+
+    LlamaForCausalLM(
+        LlamaConfig(vocab_size=len(tokenizer), hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=128)
+    ).save_pretrained(paths["causal_lm"])
+    tokenizer.chat_template = CHAT_TEMPLATE
+    tokenizer.save_pretrained(paths["causal_lm"])
+
+    for path in paths.values():
+        open(os.path.join(path, "done"), "w").close()
+    return paths
+
+
+
+def make_rows(rows: int, seed: int = 0) -> dict[str, list]:
+    """Synthetic Spanish-like rows: short answers, long answers and about 20% repeated references."""
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+
+    def sentences(count: int) -> list[str]:
+        lengths = np.where(rng.random(count) < 0.5, rng.integers(2, 8, count), rng.integers(20, 80, count))
+        return [" ".join(rng.choice(words, length)) for length in lengths]
+
+    references = sentences(rows)
+    repeated = rng.random(rows) < 0.2
+    references = [references[int(rng.integers(0, rows))] if repeat else reference for reference, repeat in zip(references, repeated)]
+    return {
+        "predictions": sentences(rows),
+        "references": references,
+        "contexts": sentences(rows),
+        "previous_conversations": [[{"role": "user", "content": text}] for text in sentences(rows)],
+        "letters": np.array(list("ABCDE"))[rng.integers(0, 5, (2, rows))].tolist(),
+    }
+
+
+
+def canned_judge(model_name: str):
+    from eval_llms.judges import Generation, JudgeBackend
+
+    feedbacks = ["La respuesta es correcta y clara. Puntuación: 8", "Respuesta parcial (6/10)", "Respuesta sin puntuación."]
+
+    class CannedJudge(JudgeBackend):
+        def __init__(self):
+            self.model_name = model_name
+
+        def generate(self, prompts: list[str], sampling_params: dict) -> list[Generation]:
+            return [Generation(feedbacks[len(prompt) % len(feedbacks)], len(prompt), 8, 0) for prompt in prompts]
+
+    return CannedJudge()
+
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+
+def run_metric(name: str, sizes: list[int], calls: int, paths: dict[str, str]) -> list[dict]:
+    from eval_llms import Accuracy, BiEncoderScore, PrometheusScore, SASEnsemble, SemanticAnswerSimilarity
+
+    if name == "accuracy":
+        metric, make_call = Accuracy(), lambda metric, data: metric.score(*data["letters"])
+    elif name == "bi_encoder":
+        metric, make_call = BiEncoderScore(), lambda metric, data: metric.score(data["predictions"], data["references"], model_name=paths["bi_encoder"])
+    elif name == "sas":
+        metric, make_call = SemanticAnswerSimilarity(), lambda metric, data: metric.score(data["predictions"], data["references"], model_name=paths["cross_encoder"])
+    elif name == "sas_ensemble":
+        model_names = [paths["bi_encoder"], paths["cross_encoder"]]
+        metric, make_call = SASEnsemble(), lambda metric, data: metric.score(data["predictions"], data["references"], model_names=model_names)
+    elif name == "prometheus":
+        judge = canned_judge(paths["causal_lm"])
+        metric, make_call = PrometheusScore(), lambda metric, data: metric.score(
+            data["predictions"], data["references"], model_name=paths["causal_lm"], contexts=data["contexts"],
+            previous_conversations=data["previous_conversations"], backend=judge
+        )
+    else:
+        raise ValueError(f"Unknown metric {name}, expected one of {METRICS}.")
+
+    start = time.perf_counter()
+    make_call(metric, make_rows(8, seed=1))
+    load_seconds = time.perf_counter() - start
+
+    results = []
+    for rows in sorted(sizes):
+        data = make_rows(rows)
+        timings = []
+        for _ in range(calls):
+            start = time.perf_counter()
+            make_call(metric, data)
+            timings.append(time.perf_counter() - start)
+
+        median = float(np.median(timings))
+        results.append({
+            "metric": name,
+            "rows": rows,
+            "calls": calls,
+            "load_seconds": load_seconds,
+            "median_seconds": median,
+            "min_seconds": float(np.min(timings)),
+            "rows_per_sec": rows / median,
+            "peak_rss_mb": peak_rss_mb(),
+        })
+    return results
+
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    import torch
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000])
+    parser.add_argument("--calls", type=int, default=5)
+    parser.add_argument("--metrics", nargs="+", default=METRICS, choices=METRICS)
+    parser.add_argument("--models-dir", default=os.path.join(tempfile.gettempdir(), "eval_llms_benchmark_models"))
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    # Benchmarks must never reach the Hub, even for a config lookup.
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    paths = build_checkpoints(args.models_dir)
+
+    results = []
+    for name in args.metrics:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            metric_results = executor.submit(run_metric, name, args.sizes, args.calls, paths).result()
+        for result in metric_results:
+            print(
+                f"{result['metric']:<13} rows={result['rows']:>8,} {result['rows_per_sec']:>12,.0f} rows/s "
+                f"{result['median_seconds'] * 1e3:>10.1f} ms/call peak_rss={result['peak_rss_mb']:>7,.0f} MB"
+            )
+        results.extend(metric_results)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+
+if __name__ == "__main__":
+    main()
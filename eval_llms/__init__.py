@@ -1,5 +1,62 @@
-from .biencoder import BiEncoderScore
-from .sas import SemanticAnswerSimilarity
-from .sas_ensemble import SASEnsemble
-from .accuracy import Accuracy
-from .prometheus import PrometheusScore
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+
+
+# Public names and the submodule defining them. Submodules are only imported on first attribute access, so
+# `from eval_llms import Accuracy` never pays for sentence_transformers or vLLM.
+_EXPORTS = {
+    "BiEncoderScore": "biencoder",
+    "SemanticAnswerSimilarity": "sas",
+    "SASEnsemble": "sas_ensemble",
+    "Accuracy": "accuracy",
+    "PrometheusScore": "prometheus",
+    "ModelRegistry": "registry",
+    "model_registry": "registry",
+    "EmbeddingCache": "embedding_cache",
+    "RunningAggregate": "streaming",
+    "stream_compute": "streaming",
+    "JudgeBackend": "judges",
+    "OpenAICompatibleBackend": "judges",
+    "VLLMBackend": "judges",
+    "JudgmentCache": "judgment_cache",
+    "instrument": "instrumentation",
+    "LoggingExporter": "instrumentation",
+    "StageEvent": "instrumentation",
+    "StageSummary": "instrumentation",
+    "run_metrics": "runner",
+    "Leaderboard": "leaderboard",
+    "leaderboard": "leaderboard",
+}
+
+__all__ = list(_EXPORTS)
+
+if TYPE_CHECKING:
+    from .biencoder import BiEncoderScore
+    from .sas import SemanticAnswerSimilarity
+    from .sas_ensemble import SASEnsemble
+    from .accuracy import Accuracy
+    from .prometheus import PrometheusScore
+    from .registry import ModelRegistry, model_registry
+    from .embedding_cache import EmbeddingCache
+    from .streaming import RunningAggregate, stream_compute
+    from .judges import JudgeBackend, OpenAICompatibleBackend, VLLMBackend
+    from .judgment_cache import JudgmentCache
+    from .instrumentation import LoggingExporter, StageEvent, StageSummary, instrument
+    from .runner import run_metrics
+    from .leaderboard import Leaderboard, leaderboard
+
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,6 +1,11 @@
+import re
 import datasets
 import evaluate
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from .instrumentation import stage
+from .utils import DirectScoring
 
 
 
@@ -11,6 +16,8 @@ _CITATION = ""
 _DESCRIPTION = """
 This metric computes accuracy for multiple-choice or test-type tasks by comparing the predicted answers to the reference answers.
 It checks for exact equality between the predictions and references after converting both to lowercase and stripping extra spaces.
+Optionally, accents and punctuation can be removed and the option letter can be extracted from generative answers
+such as "La respuesta correcta es la B)". All normalization and comparison runs in bulk with Arrow compute kernels.
 """
 
 
@@ -22,6 +29,11 @@ Args:
     predictions: list of strings. The predicted answers.
     references: list of strings. The correct reference answers.
     return_average: bool, optional (default=False). If True, returns the accuracy score along with the individual comparison results.
+    fold_accents: bool, optional (default=False). If True, removes accents and other combining marks ("canción" == "cancion").
+    strip_punctuation: bool, optional (default=False). If True, removes punctuation characters before comparing.
+    extract_option: bool, string or compiled regex, optional (default=False). If True, extracts the option letter (a-e) from
+        answers like "La respuesta correcta es la B)". A custom pattern (RE2 syntax, applied to the lowercased text) must
+        define a named group `option`. Rows without a match are compared as full strings.
 
 Returns:
     list of bool or tuple of (list of bool, float): 
@@ -42,7 +54,37 @@ Examples:
 
 
 
-class Accuracy(evaluate.Metric):
+OPTION_PATTERN = r"(?:^|[\s(])(?P<option>[a-e])(?:[).:]|\s*$)"
+
+
+
+def normalize(
+    texts: list[str] | pa.Array | pa.ChunkedArray,
+    fold_accents: bool = False,
+    strip_punctuation: bool = False,
+    extract_option: bool | str | re.Pattern = False,
+) -> pa.Array | pa.ChunkedArray:
+    if not isinstance(texts, (pa.Array, pa.ChunkedArray)):
+        texts = pa.array(texts, type=pa.string())
+
+    texts = pc.utf8_lower(texts)
+    if fold_accents:
+        texts = pc.replace_substring_regex(pc.utf8_normalize(texts, form="NFD"), r"\p{Mn}", "")
+    texts = pc.utf8_trim_whitespace(texts)
+
+    if extract_option:
+        pattern = OPTION_PATTERN if extract_option is True else getattr(extract_option, "pattern", extract_option)
+        options = pc.struct_field(pc.extract_regex(texts, pattern), "option")
+        texts = pc.coalesce(options, texts)
+
+    if strip_punctuation:
+        texts = pc.utf8_trim_whitespace(pc.replace_substring_regex(texts, r"\p{P}", ""))
+
+    return texts
+
+
+
+class Accuracy(DirectScoring, evaluate.Metric):
     def _info(self):
         return evaluate.MetricInfo(
             description=_DESCRIPTION,
@@ -61,16 +103,21 @@ class Accuracy(evaluate.Metric):
         self, 
         predictions: list[str], 
         references: list[str], 
-        return_average: bool = False
+        return_average: bool = False,
+        fold_accents: bool = False,
+        strip_punctuation: bool = False,
+        extract_option: bool | str | re.Pattern = False
     ) -> list[bool] | tuple[list[bool], float]:
         
-        scores = [
-            prediction.lower().strip() == reference.lower().strip()
-            for prediction, reference in zip(predictions, references)
-        ]
+        options = dict(fold_accents=fold_accents, strip_punctuation=strip_punctuation, extract_option=extract_option)
+        with stage("Accuracy", "normalize", rows=len(predictions)):
+            predictions, references = normalize(predictions, **options), normalize(references, **options)
+        with stage("Accuracy", "compare", rows=len(predictions)):
+            matches = pc.fill_null(pc.equal(predictions, references), False).to_numpy(zero_copy_only=False)
+        scores = matches.tolist()
         
         if return_average:
-            avg_score = float(np.mean(scores))
+            avg_score = float(np.mean(matches))
             return scores, avg_score
         
         return scores
\ No newline at end of file
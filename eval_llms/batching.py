@@ -0,0 +1,66 @@
+from typing import Callable
+import numpy as np
+
+
+
+def token_lengths(tokenizer, texts: list[str], text_pairs: list[str] | None = None, max_length: int | None = None) -> np.ndarray:
+    """Tokenizes the inputs without padding and returns the length of every row (the input IDs are not kept)."""
+    encoded = tokenizer(texts, text_pairs, truncation=True, max_length=max_length)
+    return np.fromiter(map(len, encoded["input_ids"]), dtype=np.int64, count=len(texts))
+
+
+
+def token_budget_batches(lengths: list[int] | np.ndarray, max_tokens_per_batch: int) -> list[np.ndarray]:
+    """
+    Groups row indices into batches sorted by length, so that every padded batch (rows x longest row)
+    stays within `max_tokens_per_batch` tokens. A row longer than the budget gets a batch of its own.
+    """
+    lengths = np.asarray(lengths)
+    batches = []
+    current = []
+    longest = 0
+
+    # Longest rows first, so a batch that does not fit in memory fails right away.
+    for i in np.argsort(-lengths, kind="stable"):
+        length = int(lengths[i])
+        if current and max(longest, length) * (len(current) + 1) > max_tokens_per_batch:
+            batches.append(np.array(current))
+            current, longest = [], 0
+        current.append(i)
+        longest = max(longest, length)
+
+    if current:
+        batches.append(np.array(current))
+    return batches
+
+
+
+def fixed_size_batches(num_rows: int, batch_size: int) -> list[np.ndarray]:
+    return [np.arange(start, min(start + batch_size, num_rows)) for start in range(0, num_rows, batch_size)]
+
+
+
+def padding_fraction(lengths: list[int] | np.ndarray, batches: list[np.ndarray]) -> float:
+    """Share of the padded token slots that hold padding instead of real tokens."""
+    lengths = np.asarray(lengths)
+    padded = sum(len(batch) * int(lengths[batch].max()) for batch in batches if len(batch))
+    return 1 - int(lengths.sum()) / padded if padded else 0.0
+
+
+
+def run_batched(
+    lengths: list[int] | np.ndarray,
+    max_tokens_per_batch: int,
+    predict: Callable[[np.ndarray], np.ndarray],
+) -> np.ndarray:
+    """Calls `predict` with the row indices of each token-budget batch and scatters the outputs back to input order."""
+    batches = token_budget_batches(lengths, max_tokens_per_batch)
+    outputs = None
+
+    for batch in batches:
+        batch_outputs = np.asarray(predict(batch))
+        if outputs is None:
+            outputs = np.empty((len(lengths), *batch_outputs.shape[1:]), dtype=batch_outputs.dtype)
+        outputs[batch] = batch_outputs
+
+    return outputs if outputs is not None else np.empty((0,))
@@ -1,9 +1,18 @@
-import torch
 import datasets
 import evaluate
 import numpy as np
-from torch.nn import CosineSimilarity
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING
+from .batching import run_batched, token_lengths
+from .embedding_cache import EmbeddingCache, get_embedding_cache
+from .encoding_pool import get_encoding_pool
+from .instrumentation import stage
+from .onnx_export import load_onnx_model, onnx_model_size
+from .precision import CompactEmbeddings
+from .registry import model_registry
+from .utils import aggregate_segments, dedup_ratio, deduplicate, DirectScoring, flatten_references, get_device
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 
 
@@ -32,16 +41,44 @@ Computes BiEncoder Score.
 
 Args:
     predictions: list of strings. The predicted text sequences.
-    references: list of strings. The reference text sequences.
+    references: list of strings, or list of lists of strings. The reference text sequences; with several acceptable references
+        per prediction, each prediction is scored against all of them and the similarities are aggregated.
     model_name: string, optional (default="sentence-transformers/paraphrase-multilingual-mpnet-base-v2"). 
         The name of the Sentence Transformer model to be used.
     batch_size: int, optional (default=64). The batch size to use for embedding computation.
     return_average: bool, optional (default=False). If True, returns both the individual similarity scores and the average score.
+    embedding_cache: string or EmbeddingCache, optional (default=None). Directory (or cache instance) of an on-disk embedding
+        cache. When given, only texts whose embeddings are not cached yet are encoded. Embeddings are stored per model, backend
+        and quantization, so torch, ONNX and int8 ONNX vectors are never mixed.
+    max_tokens_per_batch: int, optional (default=None). If given, texts are sorted by token length and grouped into batches of
+        at most this many (padded) tokens instead of `batch_size` rows, which avoids padding short texts to the length of long
+        ones. The lengths cost an extra tokenizer pass, since the model tokenizes every batch again when encoding it.
+    backend: string, optional (default="torch"). Inference backend, "torch" or "onnx". The ONNX backend runs on CPU with
+        ONNX Runtime (requires the `onnx` extra, `optimum[onnxruntime]`); the graph is exported once per model and cached locally.
+    quantize: bool, optional (default=False). With the ONNX backend, use a dynamically int8-quantized graph.
+    num_workers: int, optional (default=None). If given, texts are encoded on CPU by a persistent pool of this many worker
+        processes, each with its own model copy, and embeddings are returned through shared memory. The pool is reused
+        across compute() calls.
+    threads_per_worker: int, optional (default=None). Intra-op threads of each pool worker. Defaults to the CPU count
+        divided by `num_workers`.
+    return_stats: bool, optional (default=False). If True, also returns a dictionary of run statistics:
+        - dedup_ratio: fraction of the input texts that were duplicates and were not encoded again.
+        - embedding_bytes: memory held by the stored embeddings (only when `precision` is set).
+    reference_aggregation: string, optional (default="max"). How the similarities of a prediction with its several references
+        are combined, "max" or "mean". A prediction with an empty list of references scores NaN
+        and is left out of the average.
+    precision: string, optional (default=None). Store the embeddings L2-normalized at reduced precision and score with dot
+        products: "float32", "float16", "int8" (per-row scalar quantization) or "binary" (packed sign bits, approximate).
+        Texts are encoded and compressed `chunk_size` at a time and similarities are computed in chunks of `chunk_size`
+        pairs, so the full float32 embedding matrices never exist at once. The default keeps full float32 tensors and
+        torch's cosine similarity.
+    chunk_size: int, optional (default=65536). Number of texts encoded and pairs scored per chunk when `precision` is set.
 
 Returns:
     list of float or tuple of (list of float, float):
         - If return_average is False, returns a list of similarity scores (Cosine similarity) between the prediction and reference pairs.
         - If return_average is True, returns a tuple containing the list of similarity scores and the average similarity score.
+        - If return_stats is True, the statistics dictionary is appended as the last element of the returned tuple.
 
 Examples:
 
@@ -57,19 +94,71 @@ Examples:
 
 
 
+def load_sentence_transformer(model_name: str, device: str, backend: str = "torch", quantize: bool = False) -> "SentenceTransformer":
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        return model_registry.get(
+            model_name,
+            lambda: load_onnx_model(SentenceTransformer, model_name, quantize=quantize),
+            device="cpu",
+            dtype="qint8" if quantize else "float32",
+            backend="sentence-transformers-onnx",
+            size_fn=lambda model: onnx_model_size(SentenceTransformer, model_name, quantize=quantize),
+        )
+    if backend != "torch":
+        raise ValueError(f"Unsupported backend {backend}, expected 'torch' or 'onnx'.")
+
+    return model_registry.get(
+        model_name,
+        lambda: SentenceTransformer(model_name, device=device),
+        device=device,
+        backend="sentence-transformers",
+    )
+
+
+
+def embedding_cache_key(model_name: str, backend: str = "torch", quantize: bool = False) -> str:
+    """Embedding cache store of a model: each backend (and the int8 graph) produces slightly different vectors."""
+    return f"{model_name}::{backend}{'-qint8' if quantize else ''}"
+
+
+
+def encode_texts(model: "SentenceTransformer", texts: list[str], batch_size: int = 64, max_tokens_per_batch: int | None = None) -> np.ndarray:
+    if max_tokens_per_batch is None:
+        return model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    with stage("BiEncoderScore", "tokenize", rows=len(texts)):
+        lengths = token_lengths(model.tokenizer, texts, max_length=model.max_seq_length)
+    return run_batched(
+        lengths,
+        max_tokens_per_batch,
+        lambda batch: model.encode([texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True),
+    )
+
+
+
 @evaluate.utils.file_utils.add_start_docstrings(_DESCRIPTION, _KWARGS_DESCRIPTION)
-class BiEncoderScore(evaluate.Metric):
+class BiEncoderScore(DirectScoring, evaluate.Metric):
     def _info(self):
         return evaluate.MetricInfo(
             description=_DESCRIPTION,
             citation=_CITATION,
             inputs_description=_KWARGS_DESCRIPTION,
-            features=datasets.Features(
-                {
-                    "predictions": datasets.Value(dtype="string"),
-                    "references": datasets.Value(dtype="string"),
-                },
-            ),
+            features=[
+                datasets.Features(
+                    {
+                        "predictions": datasets.Value(dtype="string"),
+                        "references": datasets.Sequence(datasets.Value(dtype="string")),
+                    },
+                ),
+                datasets.Features(
+                    {
+                        "predictions": datasets.Value(dtype="string"),
+                        "references": datasets.Value(dtype="string"),
+                    },
+                ),
+            ],
             reference_urls=["https://arxiv.org/abs/2108.06130"],
         )
 
@@ -81,19 +170,86 @@ class BiEncoderScore(evaluate.Metric):
         model_name: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
         return_average: bool = False,
         batch_size: int = 64, 
-    ) -> list[float] | tuple[list[float], float]:        
-        
-        device = "cuda" if torch.cuda.is_available() else "cpu"
+        embedding_cache: str | EmbeddingCache | None = None,
+        max_tokens_per_batch: int | None = None,
+        backend: str = "torch",
+        quantize: bool = False,
+        num_workers: int | None = None,
+        threads_per_worker: int | None = None,
+        return_stats: bool = False,
+        reference_aggregation: str = "max",
+        precision: str | None = None,
+        chunk_size: int = 65536,
+    ) -> list[float] | tuple[list[float], float] | tuple[list[float], dict] | tuple[list[float], float, dict]:        
+        import torch
+        from torch.nn import CosineSimilarity
+
         metric = CosineSimilarity(dim=1)
-        model = SentenceTransformer(model_name, device=device)
 
-        predictions_embeddings = model.encode(predictions, batch_size=batch_size, convert_to_tensor=True)
-        references_embeddings = model.encode(references, batch_size=batch_size, convert_to_tensor=True)
-        scores = metric(predictions_embeddings, references_embeddings).tolist()
+        if not predictions:
+            # Nothing to encode, so the model is not even loaded.
+            stats = {"dedup_ratio": 0.0, **({"embedding_bytes": 0} if precision is not None else {})}
+            if return_average:
+                return ([], float("nan"), stats) if return_stats else ([], float("nan"))
+            return ([], stats) if return_stats else []
+
+        with stage("BiEncoderScore", "model_load"):
+            if num_workers:
+                model = None
+                pool = get_encoding_pool(model_name, num_workers, threads_per_worker, backend=backend, quantize=quantize)
+                encode_fn = lambda texts: pool.encode(texts, batch_size, max_tokens_per_batch)
+            else:
+                model = load_sentence_transformer(model_name, get_device(), backend=backend, quantize=quantize)
+                encode_fn = lambda texts: encode_texts(model, texts, batch_size, max_tokens_per_batch)
+
+        # Several references per prediction are flattened, so every reference is encoded in the same batched call.
+        references, reference_counts = flatten_references(references)
+
+        # Every distinct string is encoded once, whether it appears as a prediction, a reference or both.
+        with stage("BiEncoderScore", "deduplicate", rows=len(predictions) + len(references)):
+            texts, inverse = deduplicate(list(predictions) + references)
+
+        cache = get_embedding_cache(embedding_cache) if embedding_cache is not None else None
+        cache_key = embedding_cache_key(model_name, backend, quantize)
+        if precision is None:
+            with stage("BiEncoderScore", "encode", rows=len(texts)):
+                if cache is not None:
+                    embeddings = torch.from_numpy(cache.encode(model, cache_key, texts, batch_size=batch_size, encode_fn=encode_fn))
+                elif num_workers or max_tokens_per_batch is not None:
+                    embeddings = torch.from_numpy(encode_fn(texts))
+                else:
+                    embeddings = model.encode(texts, batch_size=batch_size, convert_to_tensor=True)
+
+            with stage("BiEncoderScore", "similarity", rows=len(references)):
+                inverse = torch.from_numpy(inverse).to(embeddings.device)
+                # Each prediction embedding is repeated once per reference of that prediction, then one similarity per pair.
+                prediction_rows = torch.from_numpy(np.repeat(np.arange(len(predictions)), reference_counts)).to(embeddings.device)
+                predictions_embeddings = embeddings[inverse[:len(predictions)][prediction_rows]]
+                references_embeddings = embeddings[inverse[len(predictions):]]
+                similarities = metric(predictions_embeddings, references_embeddings).cpu().numpy()
+                scores = aggregate_segments(similarities, reference_counts, reference_aggregation).tolist()
+        else:
+            # Texts are encoded chunk by chunk and every chunk is compressed right away, so only one float32 chunk exists at a time.
+            if cache is not None:
+                encode_chunk = lambda chunk: cache.encode(model, cache_key, chunk, batch_size=batch_size, encode_fn=encode_fn)
+            else:
+                encode_chunk = encode_fn
+            with stage("BiEncoderScore", "encode", rows=len(texts)):
+                compact = CompactEmbeddings(len(texts), precision)
+                for start in range(0, len(texts), chunk_size):
+                    compact.set(start, encode_chunk(texts[start:start + chunk_size]))
+
+            with stage("BiEncoderScore", "similarity", rows=len(references)):
+                prediction_rows = np.repeat(np.arange(len(predictions)), reference_counts)
+                similarities = compact.pair_similarity(inverse[:len(predictions)][prediction_rows], inverse[len(predictions):], chunk_size)
+                scores = aggregate_segments(similarities, reference_counts, reference_aggregation).tolist()
+        stats = {"dedup_ratio": dedup_ratio(len(inverse), len(texts))}
+        if precision is not None:
+            stats["embedding_bytes"] = compact.nbytes
         
         if return_average:
-            avg_score = float(np.mean(scores))
-            return scores, avg_score
+            avg_score = float(np.nanmean(scores))
+            return (scores, avg_score, stats) if return_stats else (scores, avg_score)
 
-        return scores
+        return (scores, stats) if return_stats else scores
 
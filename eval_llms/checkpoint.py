@@ -0,0 +1,90 @@
+import hashlib
+import json
+import math
+import os
+import tempfile
+from typing import Iterable
+
+
+
+class RunDirectory:
+    """
+    Sharded checkpoints of a long judge run.
+
+    `manifest.json` records a fingerprint of the inputs, the number of rows and the shard size, and every completed shard
+    is written to `shards/shard-<k>.json` with an atomic rename, so a restarted run only redoes the shards that had not
+    finished. Reusing a directory with different inputs or a different shard size raises a ValueError.
+    """
+
+    def __init__(self, path: str, fingerprint: str, num_rows: int, shard_size: int):
+        if shard_size < 1:
+            raise ValueError(f"shard_size must be positive, got {shard_size}.")
+
+        self.path = os.path.expanduser(path)
+        self.num_rows = num_rows
+        self.shard_size = shard_size
+        os.makedirs(os.path.join(self.path, "shards"), exist_ok=True)
+
+        manifest = {"fingerprint": fingerprint, "num_rows": num_rows, "shard_size": shard_size}
+        manifest_path = os.path.join(self.path, "manifest.json")
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                existing = json.load(f)
+            if existing != manifest:
+                raise ValueError(
+                    f"{self.path} holds a run with different inputs or shard size; use a new run directory or delete it."
+                )
+        else:
+            self._write_atomic(manifest_path, manifest)
+
+
+    @staticmethod
+    def fingerprint(parts: Iterable[str]) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = part.encode("utf-8")
+            digest.update(len(encoded).to_bytes(8, "little"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+
+    @property
+    def num_shards(self) -> int:
+        return math.ceil(self.num_rows / self.shard_size)
+
+
+    def shard_rows(self, shard: int) -> range:
+        return range(shard * self.shard_size, min((shard + 1) * self.shard_size, self.num_rows))
+
+
+    def shard_path(self, shard: int) -> str:
+        return os.path.join(self.path, "shards", f"shard-{shard:05d}.json")
+
+
+    def is_complete(self, shard: int) -> bool:
+        return os.path.exists(self.shard_path(shard))
+
+
+    def load(self, shard: int) -> tuple[list[str], list[int | float]]:
+        with open(self.shard_path(shard), encoding="utf-8") as f:
+            data = json.load(f)
+        return data["feedbacks"], [math.nan if score is None else score for score in data["scores"]]
+
+
+    def save(self, shard: int, feedbacks: list[str], scores: list[int | float]):
+        scores = [None if isinstance(score, float) and math.isnan(score) else int(score) for score in scores]
+        self._write_atomic(self.shard_path(shard), {"feedbacks": feedbacks, "scores": scores})
+
+
+    def _write_atomic(self, path: str, data: dict):
+        fd, scratch = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(scratch, path)
+        except BaseException:
+            if os.path.exists(scratch):
+                os.remove(scratch)
+            raise
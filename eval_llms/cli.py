@@ -0,0 +1,67 @@
+import argparse
+import json
+from .runner import DEFAULT_BI_ENCODER, DEFAULT_CROSS_ENCODER, DEFAULT_METRICS, METRICS, read_table, run_metrics, summarize, write_table
+from .streaming import DEFAULT_COLUMNS
+
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="eval-llms",
+        description="Scores a JSONL or Parquet file with several metrics in one pass and writes a combined results table.",
+    )
+    parser.add_argument("input", help="JSONL or Parquet file with prediction, reference and, for prometheus, context columns.")
+    parser.add_argument("--output", "-o", required=True, help="Output .jsonl or .parquet file with the input and score columns.")
+    parser.add_argument("--metrics", nargs="+", default=DEFAULT_METRICS, choices=METRICS)
+    parser.add_argument("--bi-encoder", default=DEFAULT_BI_ENCODER)
+    parser.add_argument("--cross-encoder", default=DEFAULT_CROSS_ENCODER)
+    parser.add_argument("--ensemble", nargs="+", default=None, help="Ensemble members (default: the bi-encoder and the cross-encoder).")
+    parser.add_argument("--ensemble-weights", nargs="+", type=float, default=None)
+    parser.add_argument("--judge", default=None, help="Prometheus judge model.")
+    parser.add_argument("--judge-url", default=None, help="OpenAI-compatible server hosting the judge, instead of in-process vLLM.")
+    parser.add_argument("--judge-api-key", default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--backend", default="torch", choices=["torch", "onnx"])
+    parser.add_argument("--quantize", action="store_true")
+    parser.add_argument("--embedding-cache", default=None)
+    parser.add_argument("--judgment-cache", default=None)
+    for name, column in DEFAULT_COLUMNS.items():
+        parser.add_argument(f"--{column.replace('_', '-')}-column", dest=name, default=column)
+    return parser.parse_args(argv)
+
+
+
+def main(argv: list[str] | None = None):
+    args = parse_args(argv)
+    column_mapping = {name: getattr(args, name) for name in DEFAULT_COLUMNS}
+    data = read_table(args.input, column_mapping)
+
+    judge_backend = None
+    if args.judge_url:
+        from .judges import OpenAICompatibleBackend
+
+        judge_backend = OpenAICompatibleBackend(args.judge_url, args.judge, api_key=args.judge_api_key)
+
+    results = run_metrics(
+        data,
+        metrics=args.metrics,
+        bi_encoder=args.bi_encoder,
+        cross_encoder=args.cross_encoder,
+        ensemble=args.ensemble or ([args.bi_encoder, args.cross_encoder] if "sas_ensemble" in args.metrics else None),
+        ensemble_weights=args.ensemble_weights,
+        judge=args.judge,
+        judge_backend=judge_backend,
+        batch_size=args.batch_size,
+        embedding_cache=args.embedding_cache,
+        judgment_cache=args.judgment_cache,
+        backend=args.backend,
+        quantize=args.quantize,
+    )
+
+    write_table({column_mapping.get(name, name): values for name, values in results.items()}, args.output)
+    print(json.dumps(summarize(results), indent=2))
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import re
+import numpy as np
+from .biencoder import encode_texts, load_sentence_transformer
+from .instrumentation import stage
+from .utils import deduplicate, get_device
+
+
+
+DEFAULT_COMPRESSION_MODEL = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+
+# A sentence ends after terminal punctuation (and closing quotes or brackets) followed by whitespace, or at a blank line.
+SENTENCE_END = re.compile(r"[.!?…][\"'»)\]]*\s+|\n\s*\n")
+
+OMITTED = "\n[...]\n"
+
+
+
+def chunk_spans(text: str, offsets: list[tuple[int, int]], chunk_tokens: int) -> list[tuple[int, int, int]]:
+    """
+    Splits `text` into consecutive chunks of at most `chunk_tokens` tokens, ending them at a sentence boundary when one falls
+    inside the chunk. `offsets` are the character offsets of the tokens of `text`. Returns (start char, end char, tokens) per
+    chunk; the chunks cover the whole text, so concatenating adjacent chunks gives back the original substring.
+    """
+    starts = np.array([start for start, _ in offsets], dtype=np.int64)
+    boundaries = set(np.searchsorted(starts, [match.end() for match in SENTENCE_END.finditer(text)]).tolist())
+
+    token_spans = []
+    start = 0
+    while start < len(offsets):
+        end = min(start + chunk_tokens, len(offsets))
+        if end < len(offsets):
+            end = next((boundary for boundary in range(end, start, -1) if boundary in boundaries), end)
+        token_spans.append((start, end))
+        start = end
+
+    chars = [0] + [int(starts[start]) for start, _ in token_spans[1:]] + [len(text)]
+    return [(chars[k], chars[k + 1], end - start) for k, (start, end) in enumerate(token_spans)]
+
+
+
+def select_chunks(scores: np.ndarray, lengths: list[int], budget: int) -> list[int]:
+    """Indices, in text order, of the highest-scoring chunks that fit together in `budget` tokens."""
+    kept = []
+    used = 0
+    for k in np.argsort(-scores, kind="stable"):
+        if used + lengths[k] <= budget:
+            kept.append(int(k))
+            used += lengths[k]
+    return sorted(kept)
+
+
+
+def join_chunks(text: str, spans: list[tuple[int, int, int]], kept: list[int]) -> str:
+    """Kept chunks in their original order; every run of dropped chunks is replaced by a single [...] marker."""
+    kept = set(kept)
+    parts = []
+    run_start = None
+    for k, (start, end, _) in enumerate(spans):
+        if k in kept and run_start is None:
+            run_start = start
+        if k not in kept:
+            if run_start is not None:
+                parts.append(text[run_start:start].strip())
+                run_start = None
+            if not parts or parts[-1] is not OMITTED:
+                parts.append(OMITTED)
+    if run_start is not None:
+        parts.append(text[run_start:].strip())
+    return "".join(parts).strip()
+
+
+
+def compress_contexts(
+    contexts: list[str],
+    queries: list[str],
+    tokenizer,
+    budget: int,
+    chunk_tokens: int = 128,
+    model_name: str = DEFAULT_COMPRESSION_MODEL,
+    batch_size: int = 64,
+    backend: str = "torch",
+    quantize: bool = False,
+) -> tuple[list[str], dict[str, int]]:
+    """
+    Shortens every context longer than `budget` tokens of `tokenizer` to its chunks most relevant to the query of its row.
+
+    Contexts are split into chunks of about `chunk_tokens` tokens along sentence boundaries, chunks and queries are encoded
+    with a sentence-transformer bi-encoder (loaded through the model registry, like `BiEncoderScore`) and the chunks with the
+    highest cosine similarity to the query are kept, in their original order, until the budget is used. Contexts within the
+    budget are returned unchanged and never encoded. Repeated contexts are chunked once and every distinct chunk or query is
+    encoded once. Returns the contexts and the number of `compressed` rows and `context_tokens_saved`.
+    """
+    if chunk_tokens < 1:
+        raise ValueError(f"chunk_tokens must be positive, got {chunk_tokens}.")
+
+    contexts = list(contexts)
+    encoded = tokenizer(contexts, add_special_tokens=False, return_offsets_mapping=True) if contexts else {"offset_mapping": []}
+    lengths = [len(offsets) for offsets in encoded["offset_mapping"]]
+    rows = [i for i, length in enumerate(lengths) if length > budget]
+    stats = {"compressed": len(rows), "context_tokens_saved": 0}
+    if not rows:
+        return contexts, stats
+
+    with stage("ContextCompression", "chunk", rows=len(rows)):
+        unique_contexts, context_index = deduplicate([contexts[i] for i in rows])
+        first_row = {}
+        for position, index in enumerate(context_index):
+            first_row.setdefault(int(index), rows[position])
+        spans = [
+            chunk_spans(text, encoded["offset_mapping"][first_row[index]], chunk_tokens)
+            for index, text in enumerate(unique_contexts)
+        ]
+        chunks = [[text[start:end] for start, end, _ in context_spans] for text, context_spans in zip(unique_contexts, spans)]
+
+    with stage("ContextCompression", "model_load"):
+        model = load_sentence_transformer(model_name, get_device(), backend=backend, quantize=quantize)
+
+    # Every distinct chunk and query is encoded once, in a single batched call.
+    texts, inverse = deduplicate([chunk for context_chunks in chunks for chunk in context_chunks] + [queries[i] for i in rows])
+    with stage("ContextCompression", "encode", rows=len(texts)):
+        embeddings = encode_texts(model, texts, batch_size)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), np.finfo(np.float32).tiny)
+
+    with stage("ContextCompression", "select", rows=len(rows)):
+        chunk_starts = np.cumsum([0] + [len(context_chunks) for context_chunks in chunks])
+        query_index = inverse[chunk_starts[-1]:]
+        for position, i in enumerate(rows):
+            index = context_index[position]
+            chunk_index = inverse[chunk_starts[index]:chunk_starts[index + 1]]
+            scores = embeddings[chunk_index] @ embeddings[query_index[position]]
+            chunk_lengths = [tokens for _, _, tokens in spans[index]]
+            kept = select_chunks(scores, chunk_lengths, budget)
+            contexts[i] = join_chunks(unique_contexts[index], spans[index], kept)
+            stats["context_tokens_saved"] += lengths[i] - sum(chunk_lengths[k] for k in kept)
+
+    return contexts, stats
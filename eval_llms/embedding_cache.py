@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import Callable
+import numpy as np
+
+
+
+def lock_file(f):
+    """Blocks until this process holds the exclusive lock of the open file `f`: flock on POSIX, msvcrt on Windows."""
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        while True:
+            try:
+                # Locks the first byte; LK_LOCK gives up after about 10 seconds, so keep waiting like flock does.
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        import fcntl
+
+        fcntl.flock(f, fcntl.LOCK_EX)
+
+
+
+def unlock_file(f):
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+
+        fcntl.flock(f, fcntl.LOCK_UN)
+
+
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFC", text).strip()
+
+
+
+def text_hash(text: str) -> str:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+
+class _EmbeddingStore:
+    """
+    Append-only embedding file for a single model.
+
+    `vectors.f32` holds the float32 rows back to back and `keys.txt` holds one text hash per row.
+    Vectors are always written before their keys, so a key is only trusted once its row is on disk.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.txt")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, ".lock")
+        os.makedirs(directory, exist_ok=True)
+
+        self.dim = None
+        self.index: dict[str, int] = {}
+        self._keys_offset = 0
+        self._num_keys = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        self._refresh()
+
+
+    @contextmanager
+    def _file_lock(self):
+        with open(self.lock_path, "a+") as f:
+            lock_file(f)
+            try:
+                yield
+            finally:
+                unlock_file(f)
+
+
+    def _refresh(self):
+        # Picks up rows appended by other processes since the last read.
+        if self.dim is None and os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                self.dim = json.load(f)["dim"]
+        if self.dim is None or not os.path.exists(self.keys_path):
+            return
+
+        rows = os.path.getsize(self.vectors_path) // (4 * self.dim) if os.path.exists(self.vectors_path) else 0
+        with open(self.keys_path) as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith("\n") or self._num_keys >= rows:
+                    break
+                self.index.setdefault(line[:-1], self._num_keys)
+                self._num_keys += 1
+                self._keys_offset += len(line.encode("utf-8"))
+
+        if self._vectors is None or self._vectors.shape[0] != rows:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim)) if rows else None
+
+
+    def missing(self, hashes: list[str]) -> list[str]:
+        with self._lock:
+            self._refresh()
+            return [key for key in dict.fromkeys(hashes) if key not in self.index]
+
+
+    def append(self, hashes: list[str], embeddings: np.ndarray):
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._lock, self._file_lock():
+            if self.dim is None:
+                self.dim = embeddings.shape[1]
+                with open(self.meta_path, "w") as f:
+                    json.dump({"dim": self.dim, "dtype": "float32"}, f)
+            self._refresh()
+
+            new_rows = [i for i, key in enumerate(hashes) if key not in self.index]
+            if not new_rows:
+                return
+            with open(self.vectors_path, "ab") as f:
+                f.write(embeddings[new_rows].tobytes())
+            with open(self.keys_path, "a") as f:
+                f.write("".join(f"{hashes[i]}\n" for i in new_rows))
+            self._refresh()
+
+
+    def lookup(self, hashes: list[str]) -> np.ndarray:
+        with self._lock:
+            self._refresh()
+            rows = np.fromiter((self.index[key] for key in hashes), dtype=np.int64, count=len(hashes))
+            return np.asarray(self._vectors[rows])
+
+
+
+class EmbeddingCache:
+    """
+    On-disk, memory-mapped embedding cache keyed by (model name, normalized text hash).
+
+    Only texts whose embedding is not stored yet are sent to the encoder; new vectors are appended
+    to the model's store and every lookup reads straight from the memory-mapped file.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self._stores: dict[str, _EmbeddingStore] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+
+    def _store(self, model_name: str) -> _EmbeddingStore:
+        with self._lock:
+            if model_name not in self._stores:
+                directory = os.path.join(self.cache_dir, re.sub(r"[^\w.-]", "--", model_name.strip("/")))
+                self._stores[model_name] = _EmbeddingStore(directory)
+            return self._stores[model_name]
+
+
+    def encode(
+        self,
+        model,
+        model_name: str,
+        texts: list[str],
+        batch_size: int = 64,
+        encode_fn: Callable[[list[str]], np.ndarray] | None = None,
+    ) -> np.ndarray:
+        store = self._store(model_name)
+        hashes = [text_hash(text) for text in texts]
+        missing = set(store.missing(hashes))
+
+        if missing:
+            # Encode the first occurrence of every missing text.
+            first = {}
+            for text, key in zip(texts, hashes):
+                if key in missing and key not in first:
+                    first[key] = text
+            if encode_fn is not None:
+                embeddings = encode_fn(list(first.values()))
+            else:
+                embeddings = model.encode(list(first.values()), batch_size=batch_size, convert_to_numpy=True)
+            store.append(list(first), embeddings)
+
+        with self._lock:
+            self.misses += len(missing)
+            self.hits += len(hashes) - len(missing)
+        return store.lookup(hashes)
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+
+_caches: dict[str, EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+
+
+def get_embedding_cache(cache: str | EmbeddingCache) -> EmbeddingCache:
+    if isinstance(cache, EmbeddingCache):
+        return cache
+
+    path = os.path.abspath(os.path.expanduser(cache))
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = EmbeddingCache(path)
+        return _caches[path]
@@ -0,0 +1,181 @@
+import os
+import multiprocessing as mp
+import queue
+import threading
+import traceback
+from itertools import count
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+from .registry import ModelKey, model_registry
+
+
+
+# How often a wait for worker results checks that the workers are still alive.
+POLL_SECONDS = 1.0
+
+
+
+def _worker(model_name: str, threads: int, backend: str, quantize: bool, tasks, results):
+    import torch
+    from .biencoder import encode_texts, load_sentence_transformer
+
+    torch.set_num_threads(threads)
+    try:
+        model = load_sentence_transformer(model_name, "cpu", backend=backend, quantize=quantize)
+        results.put(("ready", None, model.get_sentence_embedding_dimension()))
+    except Exception:
+        results.put(("error", None, traceback.format_exc()))
+        return
+
+    while (task := tasks.get()) is not None:
+        job, shm_name, start, texts, batch_size, max_tokens_per_batch = task
+        try:
+            embeddings = encode_texts(model, texts, batch_size, max_tokens_per_batch)
+            shm = SharedMemory(name=shm_name)
+            dim = embeddings.shape[1]
+            target = np.ndarray((len(texts), dim), dtype=np.float32, buffer=shm.buf, offset=start * dim * 4)
+            target[:] = embeddings
+            del target
+            shm.close()
+            results.put(("done", job, None))
+        except Exception:
+            results.put(("error", job, traceback.format_exc()))
+
+
+
+class EncodingPool:
+    """
+    Persistent pool of CPU worker processes, each holding its own copy of a sentence transformer.
+
+    Texts are split into one contiguous shard per worker and every worker writes its embeddings straight
+    into a shared memory block, so no tensors are pickled on the way back. If a worker process dies (e.g. it is
+    OOM-killed), the waiting call raises instead of blocking and the pool shuts down; `get_encoding_pool` then
+    replaces it with a fresh one.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        num_workers: int,
+        threads_per_worker: int | None = None,
+        backend: str = "torch",
+        quantize: bool = False,
+    ):
+        self.model_name = model_name
+        self.num_workers = num_workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+
+        context = mp.get_context("spawn")
+        self._tasks = [context.Queue() for _ in range(num_workers)]
+        self._results = context.Queue()
+        self._jobs = count()
+        self._lock = threading.Lock()
+        self._workers = [
+            context.Process(
+                target=_worker,
+                args=(model_name, self.threads_per_worker, backend, quantize, tasks, self._results),
+                daemon=True,
+            )
+            for tasks in self._tasks
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self.dim = None
+        for _ in self._workers:
+            status, payload = self._result(None)
+            if status == "error":
+                self.close()
+                raise RuntimeError(f"Encoding worker failed to load {model_name}:\n{payload}")
+            self.dim = payload
+
+
+    def encode(self, texts: list[str], batch_size: int = 64, max_tokens_per_batch: int | None = None) -> np.ndarray:
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+
+        with self._lock:
+            job = next(self._jobs)
+            shm = SharedMemory(create=True, size=len(texts) * self.dim * 4)
+            try:
+                bounds = np.linspace(0, len(texts), self.num_workers + 1).astype(int)
+                shards = [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+                for tasks, (start, end) in zip(self._tasks, shards):
+                    tasks.put((job, shm.name, int(start), list(texts[start:end]), batch_size, max_tokens_per_batch))
+
+                errors = []
+                for _ in shards:
+                    status, payload = self._result(job)
+                    if status == "error":
+                        errors.append(payload)
+                if errors:
+                    raise RuntimeError(f"Encoding worker failed:\n{errors[0]}")
+
+                return np.ndarray((len(texts), self.dim), dtype=np.float32, buffer=shm.buf).copy()
+            finally:
+                shm.close()
+                shm.unlink()
+
+
+    def _result(self, job: int | None) -> tuple[str, object]:
+        """Next result of `job`, skipping results left over by interrupted calls. Raises if a worker process died."""
+        while True:
+            try:
+                status, result_job, payload = self._results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                dead = [worker for worker in self._workers if not worker.is_alive()]
+                if dead:
+                    self.close()
+                    exitcodes = ", ".join(str(worker.exitcode) for worker in dead)
+                    raise RuntimeError(
+                        f"{len(dead)} encoding worker(s) for {self.model_name} exited unexpectedly (exit codes {exitcodes})."
+                    )
+                continue
+            if result_job == job:
+                return status, payload
+
+
+    @property
+    def healthy(self) -> bool:
+        return all(worker.is_alive() for worker in self._workers)
+
+
+    def close(self):
+        for tasks, worker in zip(self._tasks, self._workers):
+            if worker.is_alive():
+                tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=10)
+            if worker.is_alive():
+                worker.terminate()
+
+
+
+def get_encoding_pool(
+    model_name: str,
+    num_workers: int,
+    threads_per_worker: int | None = None,
+    backend: str = "torch",
+    quantize: bool = False,
+) -> EncodingPool:
+    """
+    Returns the process-wide pool for this model and configuration, starting it on first use. A pool that lost a worker
+    is evicted from the registry and replaced.
+    """
+    key = ModelKey(model_name, "cpu", "qint8" if quantize else "float32", f"encoding-pool-{backend}-{num_workers}x{threads_per_worker or 'auto'}")
+
+    def get() -> EncodingPool:
+        return model_registry.get(
+            model_name,
+            lambda: EncodingPool(model_name, num_workers, threads_per_worker, backend, quantize),
+            device=key.device,
+            dtype=key.dtype,
+            backend=key.backend,
+            size_fn=lambda pool: 0,
+        )
+
+    pool = get()
+    if not pool.healthy:
+        model_registry.evict(key)
+        pool = get()
+    return pool
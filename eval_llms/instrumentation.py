@@ -0,0 +1,172 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, NamedTuple
+
+
+
+class StageEvent(NamedTuple):
+    metric: str
+    stage: str
+    seconds: float
+    rows: int | None = None
+    fields: dict | None = None
+
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        return self.rows / self.seconds if self.rows is not None and self.seconds > 0 else None
+
+
+    def as_dict(self) -> dict:
+        event = {"metric": self.metric, "stage": self.stage, "seconds": self.seconds}
+        if self.rows is not None:
+            event["rows"] = self.rows
+            event["rows_per_sec"] = self.rows_per_sec
+        for name, value in (self.fields or {}).items():
+            event[name] = value
+            if name.endswith("_tokens") and value is not None and self.seconds > 0:
+                event[f"{name}_per_sec"] = value / self.seconds
+        return event
+
+
+
+Hook = Callable[[StageEvent], Any]
+_hooks: list[Hook] = []
+_hooks_lock = threading.Lock()
+
+
+
+def add_hook(hook: Hook):
+    """Registers a callback that receives a `StageEvent` every time an instrumented stage finishes."""
+    with _hooks_lock:
+        _hooks.append(hook)
+
+
+
+def remove_hook(hook: Hook):
+    with _hooks_lock:
+        if hook in _hooks:
+            _hooks.remove(hook)
+
+
+
+@contextmanager
+def instrument(*hooks: Hook) -> Iterator[None]:
+    """Registers `hooks` for the duration of the block."""
+    for hook in hooks:
+        add_hook(hook)
+    try:
+        yield
+    finally:
+        for hook in hooks:
+            remove_hook(hook)
+
+
+
+class _Stage:
+    enabled = True
+
+    def __init__(self, metric: str, name: str, rows: int | None):
+        self.metric = metric
+        self.name = name
+        self.rows = rows
+        self.fields = {}
+
+
+    def update(self, **fields: Any):
+        self.fields.update(fields)
+
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        event = StageEvent(self.metric, self.name, time.perf_counter() - self._start, self.rows, self.fields or None)
+        for hook in list(_hooks):
+            hook(event)
+
+
+
+class _NullStage:
+    enabled = False
+    rows = None
+
+    def update(self, **fields: Any):
+        pass
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc, traceback):
+        pass
+
+
+
+_NULL_STAGE = _NullStage()
+
+
+
+def stage(metric: str, name: str, rows: int | None = None) -> _Stage | _NullStage:
+    """
+    Times the enclosed block as one stage of `metric` and reports it to the registered hooks.
+
+    Without hooks this returns a shared no-op context manager, so disabled instrumentation costs one list check.
+    Extra fields such as token counts are attached with `.update(...)`; check `.enabled` before computing costly ones.
+    """
+    return _Stage(metric, name, rows) if _hooks else _NULL_STAGE
+
+
+
+class LoggingExporter:
+    """Hook that logs every stage event as one JSON object, for structured log pipelines."""
+
+    def __init__(self, logger: logging.Logger | None = None, level: int = logging.INFO):
+        self.logger = logger or logging.getLogger("eval_llms.instrumentation")
+        self.level = level
+
+
+    def __call__(self, event: StageEvent):
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, json.dumps(event.as_dict(), default=str))
+
+
+
+class StageSummary:
+    """Hook that accumulates wall time, rows and token counts per (metric, stage)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = defaultdict(lambda: defaultdict(float))
+
+
+    def __call__(self, event: StageEvent):
+        with self._lock:
+            totals = self._totals[(event.metric, event.stage)]
+            totals["calls"] += 1
+            totals["seconds"] += event.seconds
+            if event.rows is not None:
+                totals["rows"] += event.rows
+            for name, value in (event.fields or {}).items():
+                if isinstance(value, (int, float)):
+                    totals[name] += value
+
+
+    def summary(self) -> list[dict]:
+        with self._lock:
+            rows = []
+            for (metric, stage_name), totals in self._totals.items():
+                row = StageEvent(
+                    metric, stage_name, totals["seconds"], int(totals["rows"]) if "rows" in totals else None,
+                    {name: value for name, value in totals.items() if name not in ("seconds", "rows")},
+                ).as_dict()
+                row["calls"] = int(row["calls"])
+                rows.append(row)
+            return rows
@@ -0,0 +1,183 @@
+import asyncio
+import importlib.util
+import random
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+from .registry import model_registry
+
+
+
+class Generation(NamedTuple):
+    text: str
+    prompt_tokens: int | None = None
+    generated_tokens: int | None = None
+    cached_tokens: int | None = None
+
+
+
+class JudgeBackend(ABC):
+    """
+    Generates judge feedback for already rendered prompts, given as text or as lists of token IDs.
+
+    `sampling_params` is a plain dictionary with vLLM `SamplingParams` field names (max_tokens, temperature, top_p, stop, ...).
+    """
+
+    model_name: str
+
+
+    @abstractmethod
+    def generate(self, prompts: list[str] | list[list[int]], sampling_params: dict) -> list[Generation]:
+        ...
+
+
+
+def load_llm(model_name: str, gpu_memory_utilization: float = 0.9, **engine_kwargs):
+    import torch
+    from vllm import LLM
+
+    # vLLM preallocates a fixed share of the GPU, which is what the engine costs the registry.
+    def engine_size(model: LLM) -> int:
+        if not torch.cuda.is_available():
+            return 0
+        return int(gpu_memory_utilization * torch.cuda.get_device_properties(0).total_memory)
+
+    return model_registry.get(
+        model_name,
+        lambda: LLM(model_name, gpu_memory_utilization=gpu_memory_utilization, **engine_kwargs),
+        device="cuda",
+        backend="vllm" + "".join(f",{key}={value}" for key, value in sorted(engine_kwargs.items())),
+        size_fn=engine_size,
+    )
+
+
+
+class VLLMBackend(JudgeBackend):
+    """In-process vLLM engine, loaded once through the model registry."""
+
+    def __init__(self, model_name: str, gpu_memory_utilization: float = 0.9, **engine_kwargs):
+        self.model_name = model_name
+        self.gpu_memory_utilization = gpu_memory_utilization
+        self.engine_kwargs = engine_kwargs
+
+
+    @property
+    def model(self):
+        return load_llm(self.model_name, self.gpu_memory_utilization, **self.engine_kwargs)
+
+
+    def generate(self, prompts: list[str] | list[list[int]], sampling_params: dict) -> list[Generation]:
+        from vllm import SamplingParams
+
+        prompts = [{"prompt_token_ids": prompt} if isinstance(prompt, list) else prompt for prompt in prompts]
+        outputs = self.model.generate(prompts, sampling_params=SamplingParams(**sampling_params))
+        return [
+            Generation(
+                text=output.outputs[0].text,
+                prompt_tokens=len(output.prompt_token_ids or []),
+                generated_tokens=len(output.outputs[0].token_ids),
+                cached_tokens=getattr(output, "num_cached_tokens", None),
+            )
+            for output in outputs
+        ]
+
+
+
+class OpenAICompatibleBackend(JudgeBackend):
+    """
+    Asynchronous client for any OpenAI-compatible `/completions` endpoint (vLLM, TGI, llama.cpp server, ...).
+
+    Prompts are sent in batches of `batch_size` per request over a pooled connection, with at most `max_concurrency`
+    requests in flight. Connection errors, timeouts, 429 and 5xx responses are retried up to `max_retries` times with
+    exponential backoff. Token usage is reported per request, so it is attributed to the first generation of each batch.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model_name: str,
+        api_key: str | None = None,
+        max_concurrency: int = 16,
+        batch_size: int = 8,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        timeout: float = 600.0,
+    ):
+        if importlib.util.find_spec("aiohttp") is None:
+            raise ImportError('OpenAICompatibleBackend requires aiohttp, install it with `pip install "eval-llms[openai]"`.')
+
+        self.base_url = base_url.rstrip("/")
+        self.model_name = model_name
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+
+    def generate(self, prompts: list[str] | list[list[int]], sampling_params: dict) -> list[Generation]:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.agenerate(prompts, sampling_params))
+
+        # Already inside an event loop (e.g. a notebook): run the client on its own loop in a worker thread.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.agenerate(prompts, sampling_params)).result()
+
+
+    async def agenerate(self, prompts: list[str] | list[list[int]], sampling_params: dict) -> list[Generation]:
+        import aiohttp
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=timeout) as session:
+            batches = [prompts[i:i + self.batch_size] for i in range(0, len(prompts), self.batch_size)]
+            results = await asyncio.gather(*(self._request(session, semaphore, batch, sampling_params) for batch in batches))
+
+        return [generation for batch in results for generation in batch]
+
+
+    async def _request(self, session, semaphore: asyncio.Semaphore, prompts: list[str] | list[list[int]], sampling_params: dict) -> list[Generation]:
+        import aiohttp
+
+        payload = {"model": self.model_name, "prompt": prompts, **sampling_params}
+
+        for attempt in range(self.max_retries + 1):
+            retry = attempt < self.max_retries
+            body = None
+            try:
+                async with semaphore, session.post(f"{self.base_url}/completions", json=payload) as response:
+                    if retry and (response.status == 429 or response.status >= 500):
+                        pass
+                    elif response.status != 200:
+                        raise RuntimeError(f"Judge server returned {response.status}: {await response.text()}")
+                    else:
+                        body = await response.json()
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if not retry:
+                    raise
+            if body is not None:
+                break
+            # Backs off after releasing the semaphore and the connection, so other batches keep the server busy meanwhile.
+            await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+
+        choices = sorted(body["choices"], key=lambda choice: choice.get("index", 0))
+        if len(choices) != len(prompts):
+            # Judgments are matched to rows by position, so a missing or merged choice would shift every later row.
+            raise RuntimeError(f"Judge server returned {len(choices)} choices for {len(prompts)} prompts.")
+        usage = body.get("usage") or {}
+        cached_tokens = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        return [
+            Generation(
+                text=choice["text"],
+                prompt_tokens=usage.get("prompt_tokens", 0) if i == 0 else 0,
+                generated_tokens=usage.get("completion_tokens", 0) if i == 0 else 0,
+                cached_tokens=(cached_tokens if i == 0 else 0) if cached_tokens is not None else None,
+            )
+            for i, choice in enumerate(choices)
+        ]
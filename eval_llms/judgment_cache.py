@@ -0,0 +1,111 @@
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+
+
+class JudgmentCache:
+    """
+    SQLite cache of judge generations keyed by a hash of (judge model, sampling parameters, rendered prompt).
+
+    Each entry stores the feedback text and its parsed score, so cached rows skip generation entirely.
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.expanduser(path)
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS judgments ("
+            "key TEXT PRIMARY KEY, model_name TEXT NOT NULL, feedback TEXT NOT NULL, score REAL, created_at REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS judgments_model_name ON judgments (model_name)")
+        self._connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+
+    @staticmethod
+    def key(model_name: str, sampling_params: dict, prompt: str | list[int]) -> str:
+        payload = json.dumps([model_name, sampling_params, prompt], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+    def get_many(self, keys: list[str]) -> dict[str, tuple[str, float]]:
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well below SQLite's limit on bound parameters.
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT key, feedback, score FROM judgments WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                )
+                for key, feedback, score in rows:
+                    found[key] = (feedback, math.nan if score is None else score)
+            self.hits += sum(key in found for key in keys)
+            self.misses += sum(key not in found for key in keys)
+        return found
+
+
+    def put_many(self, model_name: str, entries: list[tuple[str, str, float]]):
+        now = time.time()
+        rows = [
+            (key, model_name, feedback, None if score is None or math.isnan(score) else float(score), now)
+            for key, feedback, score in entries
+        ]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO judgments VALUES (?, ?, ?, ?, ?)", rows)
+            self._connection.commit()
+
+
+    def invalidate(self, model_name: str | None = None) -> int:
+        """Deletes the entries of one judge model, or every entry if `model_name` is None. Returns the number of deleted rows."""
+        with self._lock:
+            if model_name is None:
+                cursor = self._connection.execute("DELETE FROM judgments")
+            else:
+                cursor = self._connection.execute("DELETE FROM judgments WHERE model_name = ?", (model_name,))
+            self._connection.commit()
+            return cursor.rowcount
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM judgments").fetchone()[0]
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM judgments").fetchone()[0]
+            return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+
+_caches: dict[str, JudgmentCache] = {}
+_caches_lock = threading.Lock()
+
+
+
+def get_judgment_cache(cache: str | JudgmentCache) -> JudgmentCache:
+    if isinstance(cache, JudgmentCache):
+        return cache
+
+    path = os.path.abspath(os.path.expanduser(cache))
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = JudgmentCache(path)
+        return _caches[path]
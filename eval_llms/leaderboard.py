@@ -0,0 +1,59 @@
+from typing import Any, NamedTuple
+import numpy as np
+from .streaming import RunningAggregate
+
+
+
+# Per-row inputs besides the references that every candidate shares; they are repeated once per candidate.
+SHARED_ARGUMENTS = ["contexts", "previous_conversations"]
+
+
+
+class Leaderboard(NamedTuple):
+    scores: dict[str, list]
+    table: list[dict]
+    ranking: list[str]
+
+
+
+def leaderboard(
+    metric,
+    candidates: dict[str, list],
+    references: list,
+    higher_is_better: bool = True,
+    **compute_kwargs: Any,
+) -> Leaderboard:
+    """
+    Scores the predictions of several candidate models against the same references with one call to `metric`.
+
+    The rows of every candidate are concatenated into a single batch, so references (and contexts) shared by all
+    candidates are deduplicated and encoded once, models are loaded once and batches stay full. Returns the per-row scores
+    of each candidate, a table with one row per candidate (rank, count, nan_count, mean, nanmean) and the candidate names
+    ranked by mean score, ignoring NaN scores.
+    """
+    names = list(candidates)
+    for name in names:
+        if len(candidates[name]) != len(references):
+            raise ValueError(f"Candidate {name} has {len(candidates[name])} predictions for {len(references)} references.")
+
+    for argument in SHARED_ARGUMENTS:
+        if compute_kwargs.get(argument):
+            compute_kwargs[argument] = list(compute_kwargs[argument]) * len(names)
+
+    predictions = [prediction for name in names for prediction in candidates[name]]
+    result = metric.score(predictions, list(references) * len(names), **compute_kwargs)
+    if result is None:
+        raise ValueError(f"{type(metric).__name__} could not score the candidates with the given arguments.")
+    all_scores = result[0] if isinstance(result, tuple) else result
+
+    scores = {}
+    aggregates = {}
+    for i, name in enumerate(names):
+        scores[name] = all_scores[i * len(references):(i + 1) * len(references)]
+        aggregates[name] = RunningAggregate()
+        aggregates[name].update(scores[name])
+
+    sign = -1 if higher_is_better else 1
+    ranking = sorted(names, key=lambda name: (np.isnan(aggregates[name].nanmean), sign * np.nan_to_num(aggregates[name].nanmean)))
+    table = [{"rank": rank, "model": name, **aggregates[name].as_dict()} for rank, name in enumerate(ranking, start=1)]
+    return Leaderboard(scores, table, ranking)
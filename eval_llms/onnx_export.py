@@ -0,0 +1,61 @@
+import os
+import platform
+import re
+import shutil
+import tempfile
+
+
+
+ONNX_CACHE_DIR = os.environ.get("EVAL_LLMS_ONNX_CACHE", os.path.join("~", ".cache", "eval_llms", "onnx"))
+
+
+
+def quantization_config() -> str:
+    return "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "avx512_vnni"
+
+
+
+def onnx_file_name(quantize: bool) -> str:
+    return f"onnx/model_qint8_{quantization_config()}.onnx" if quantize else "onnx/model.onnx"
+
+
+
+def onnx_export_dir(model_class, model_name: str, cache_dir: str | None = None) -> str:
+    cache_dir = os.path.expanduser(cache_dir or ONNX_CACHE_DIR)
+    return os.path.join(cache_dir, model_class.__name__, re.sub(r"[^\w.-]", "--", model_name.strip("/")))
+
+
+
+def load_onnx_model(model_class, model_name: str, quantize: bool = False, cache_dir: str | None = None):
+    """
+    Loads a SentenceTransformer or CrossEncoder with the ONNX Runtime backend on CPU.
+
+    The ONNX graph (and its dynamically int8-quantized variant) is exported once per model into `cache_dir`
+    and loaded from there afterwards.
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    export_dir = onnx_export_dir(model_class, model_name, cache_dir)
+    file_name = onnx_file_name(quantize)
+
+    if not os.path.exists(os.path.join(export_dir, onnx_file_name(False))):
+        os.makedirs(os.path.dirname(export_dir), exist_ok=True)
+        # Export into a scratch directory and move it in place, so concurrent exports never see a partial graph.
+        scratch_dir = tempfile.mkdtemp(dir=os.path.dirname(export_dir))
+        model_class(model_name, device="cpu", backend="onnx").save_pretrained(scratch_dir)
+        try:
+            os.rename(scratch_dir, export_dir)
+        except OSError:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    if quantize and not os.path.exists(os.path.join(export_dir, file_name)):
+        model = model_class(export_dir, device="cpu", backend="onnx")
+        export_dynamic_quantized_onnx_model(model, quantization_config(), export_dir)
+
+    return model_class(export_dir, device="cpu", backend="onnx", model_kwargs={"file_name": file_name})
+
+
+
+def onnx_model_size(model_class, model_name: str, quantize: bool = False, cache_dir: str | None = None) -> int:
+    path = os.path.join(onnx_export_dir(model_class, model_name, cache_dir), onnx_file_name(quantize))
+    return os.path.getsize(path) if os.path.exists(path) else 0
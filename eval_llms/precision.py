@@ -0,0 +1,87 @@
+import numpy as np
+
+
+
+PRECISIONS = ("float32", "float16", "int8", "binary")
+
+
+
+class CompactEmbeddings:
+    """
+    L2-normalized embeddings stored at reduced precision, so cosine similarity becomes a dot product.
+
+    - float32 / float16: the normalized vectors.
+    - int8: one int8 code per dimension plus one float32 scale per row (symmetric scalar quantization).
+    - binary: the sign of every dimension packed into bits; the dot product of the ±1 vectors divided by the dimension
+      (1 - 2 * hamming / dim) approximates the cosine.
+
+    Rows are written chunk by chunk with `set()` and read back dequantized to float32 one chunk at a time, so a full
+    float32 matrix of all rows is never materialized.
+    """
+
+    def __init__(self, num_rows: int, precision: str = "float16"):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported precision {precision}, expected one of {PRECISIONS}.")
+        self.num_rows = num_rows
+        self.precision = precision
+        self.dim = None
+        self.codes = None
+        self.scales = None
+
+
+    def _allocate(self, dim: int):
+        self.dim = dim
+        if self.precision == "binary":
+            self.codes = np.zeros((self.num_rows, (dim + 7) // 8), dtype=np.uint8)
+        else:
+            self.codes = np.zeros((self.num_rows, dim), dtype=self.precision)
+        if self.precision == "int8":
+            self.scales = np.zeros(self.num_rows, dtype=np.float32)
+
+
+    @property
+    def nbytes(self) -> int:
+        if self.codes is None:
+            return 0
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+
+    def set(self, start: int, embeddings: np.ndarray):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.codes is None:
+            self._allocate(embeddings.shape[1])
+        end = start + len(embeddings)
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        normalized = embeddings / np.maximum(norms, np.finfo(np.float32).tiny)
+
+        if self.precision == "binary":
+            self.codes[start:end] = np.packbits(normalized > 0, axis=1)
+        elif self.precision == "int8":
+            scales = np.abs(normalized).max(axis=1) / 127
+            self.scales[start:end] = scales
+            self.codes[start:end] = np.round(normalized / np.maximum(scales, np.finfo(np.float32).tiny)[:, None])
+        else:
+            self.codes[start:end] = normalized
+
+
+    def rows(self, index: np.ndarray) -> np.ndarray:
+        """Dequantized float32 rows at `index`."""
+        if self.precision == "binary":
+            bits = np.unpackbits(self.codes[index], axis=1, count=self.dim)
+            return (bits.astype(np.float32) * 2 - 1) / np.sqrt(self.dim, dtype=np.float32)
+        if self.precision == "int8":
+            return self.codes[index].astype(np.float32) * self.scales[index, None]
+        return self.codes[index].astype(np.float32)
+
+
+    def pair_similarity(self, left: np.ndarray, right: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        """
+        Cosine similarity of rows `left[i]` and `right[i]` for every i, computed `chunk_size` pairs at a time and clipped to
+        [-1, 1], which quantization error can otherwise overshoot.
+        """
+        similarities = np.empty(len(left), dtype=np.float32)
+        for start in range(0, len(left), chunk_size):
+            end = start + chunk_size
+            similarities[start:end] = np.einsum("ij,ij->i", self.rows(left[start:end]), self.rows(right[start:end]))
+        return np.clip(similarities, -1, 1, out=similarities)
@@ -1,9 +1,16 @@
 import datasets
 import evaluate
+import json
 import re
 import numpy as np
-from transformers import AutoTokenizer
-from vllm import LLM, SamplingParams
+from .judges import Generation, JudgeBackend, VLLMBackend
+from .checkpoint import RunDirectory
+from .context_compression import DEFAULT_COMPRESSION_MODEL, compress_contexts
+from .instrumentation import stage
+from .judgment_cache import JudgmentCache, get_judgment_cache
+from .prompt_builder import PromptBuilder
+from .registry import model_registry
+from .utils import DirectScoring
 
 
 
@@ -42,6 +49,43 @@ Args:
     previous_conversations (optional): List of previous conversations in the form of a list of dictionaries, where each dictionary contains "role" and "content" keys, reflecting the user's and model's dialogues.
     return_feedbacks (optional): Boolean flag. If set to `True`, the function will return feedbacks along with the scores.
     return_average (optional): Boolean flag. If set to `True`, the function will return the average score across all predictions.
+    backend (optional): JudgeBackend generating the feedbacks. Defaults to an in-process vLLM engine for `model_name`, which
+        always has prefix caching enabled. Use `OpenAICompatibleBackend` to query a shared judge server instead; `model_name`
+        is then only used to load the tokenizer and its chat template.
+    prefix_caching (optional): Boolean flag. Only controls the submission order, not the engine: if set to `True`, the prompts
+        are submitted sorted so that prompts sharing the instructions and the same context are adjacent, which lets the prefix
+        cache of the judge reuse them. Scores and feedbacks are returned in the original order.
+    judgment_cache (optional): Path of a SQLite judgment cache (or a JudgmentCache instance). Rows whose judge model, sampling
+        parameters and rendered prompt are already cached reuse the stored feedback and score instead of being generated.
+    repair_retries (optional): Number of extra generation rounds for the rows whose score could not be parsed. Only those rows
+        are judged again, with the regular sampling parameters updated by `repair_sampling_params` if given (e.g.
+        `{"temperature": 0.7}` only changes the temperature).
+    force_score (optional): Boolean flag. If set to `True`, rows that are still unparseable after the retries are continued
+        with a trailing "Puntuación: " line and the judge only generates the number.
+    return_stats (optional): Boolean flag. If set to `True`, a dictionary of run statistics is appended to the returned values:
+        - prefix_hit_ratio: share of prompt tokens served from the engine's prefix cache (None if the backend does not report it).
+        - cache_hits, cache_misses: rows served from and missing in the judgment cache (only when `judgment_cache` is given).
+        - repaired, unparseable: rows fixed by the repair pass and rows left without a score (only when repairing).
+        - resumed_shards, shards: shards loaded from `run_dir` and the total number of shards (only when `run_dir` is given).
+        - truncated: rows whose context or previous conversation was cut to fit `max_prompt_tokens` (only when it is given).
+        - compressed, context_tokens_saved: rows whose context was compressed and the context tokens removed from them (only
+          when `context_budget` is given).
+    run_dir (optional): Directory for resumable checkpoints. Rows are judged in shards of `shard_size` and every completed shard
+        is persisted as soon as it finishes, so a restarted run with the same inputs skips the completed shards. Scores and
+        feedbacks are reassembled in input order. A run directory cannot be reused with different inputs.
+    shard_size (optional): Number of rows per checkpoint shard (default 1000).
+    pretokenize (optional): Boolean flag. If set to `True`, prompts are sent to the backend as token IDs built with the judge's
+        tokenizer (the fixed parts of the template are tokenized once, the row values in batches), so the engine does not
+        tokenize them again. The backend must serve a model with the same tokenizer as `model_name`.
+    max_prompt_tokens (optional): Token budget of each prompt, e.g. the judge's context length minus the generated tokens.
+        Longer prompts are cut by keeping the beginning of the context and the end of the previous conversation, sharing the
+        remaining budget between both. The prediction and the reference are never cut.
+    context_budget (optional): Token budget of each context. Longer contexts are split into chunks of about `chunk_tokens`
+        tokens along sentence boundaries, the chunks are ranked by their similarity to the prediction and the last user turn
+        with the bi-encoder `compression_model`, and only the most relevant chunks that fit the budget are kept, in their
+        original order, with "[...]" marking the omitted parts. Shorter contexts are left unchanged.
+    compression_model (optional): Sentence-transformer used to rank the context chunks (default the BiEncoderScore model).
+    chunk_tokens (optional): Approximate number of tokens per context chunk (default 128).
 
 Returns:
     If `return_feedbacks` and `return_average` are both `True`, returns a tuple containing:
@@ -55,6 +99,7 @@ Returns:
         - A list of integer scores (one score for each prediction).
         - A float representing the average score across all predictions.
     Otherwise, returns a list of integer scores (one score for each prediction).
+    If `return_stats` is `True`, the statistics dictionary is appended as the last element of the returned tuple.
 
 Examples:
 
@@ -139,8 +184,48 @@ Puntuación: [1-10]
 
 
 
+SAMPLING_PARAMS = {
+    "max_tokens": 1024,
+    "top_p": 0.8,
+    "temperature": 0.3,
+    "repetition_penalty": 1.05,
+    "min_p": 0.1,
+    "stop": ["<|eot_id|>", "<|im_end|>"],
+}
+
+
+
+def prefix_hit_ratio(outputs: list[Generation]) -> float | None:
+    reported = [output for output in outputs if output.cached_tokens is not None and output.prompt_tokens is not None]
+    prompt_tokens = sum(output.prompt_tokens for output in reported)
+    if not reported or not prompt_tokens:
+        return None
+    return sum(output.cached_tokens for output in reported) / prompt_tokens
+
+
+
+def token_counts(outputs: list[Generation]) -> dict[str, int]:
+    return {
+        "prompt_tokens": sum(output.prompt_tokens or 0 for output in outputs),
+        "generated_tokens": sum(output.generated_tokens or 0 for output in outputs),
+    }
+
+
+
+def load_tokenizer(model_name: str):
+    from transformers import AutoTokenizer
+
+    return model_registry.get(
+        model_name,
+        lambda: AutoTokenizer.from_pretrained(model_name),
+        backend="tokenizer",
+        size_fn=lambda tokenizer: 0,
+    )
+
+
+
 @evaluate.utils.file_utils.add_start_docstrings(_DESCRIPTION, _KWARGS_DESCRIPTION)
-class PrometheusScore(evaluate.Metric):
+class PrometheusScore(DirectScoring, evaluate.Metric):
     def _info(self):
         return evaluate.MetricInfo(
             description=_DESCRIPTION,
@@ -174,6 +259,129 @@ class PrometheusScore(evaluate.Metric):
         return np.nan
     
 
+    def generate(
+        self,
+        backend: JudgeBackend,
+        messages: list[str] | list[list[int]],
+        prefix_caching: bool = False,
+        sampling_params: dict | None = None
+    ) -> list[Generation]:
+        sampling_params = {**SAMPLING_PARAMS, **(sampling_params or {})}
+        if not messages:
+            return []
+        if not prefix_caching:
+            return backend.generate(messages, sampling_params)
+
+        # Lexicographic order puts prompts with the longest shared prefixes (same context) next to each other.
+        order = sorted(range(len(messages)), key=messages.__getitem__)
+        outputs = backend.generate([messages[i] for i in order], sampling_params)
+        return [output for _, output in sorted(zip(order, outputs), key=lambda item: item[0])]
+
+
+    def force_scores(
+        self,
+        backend: JudgeBackend,
+        messages: list[str] | list[list[int]],
+        feedbacks: list[str],
+        prompt_builder: PromptBuilder | None = None
+    ) -> list[tuple[str, int | float]]:
+        # Continues each feedback right after a "Puntuación: " line and only lets the judge emit the number.
+        suffixes = [feedback.rstrip() + "\nPuntuación: " for feedback in feedbacks]
+        if prompt_builder is not None:
+            prompts = [prompt_builder.extend(message, suffix) for message, suffix in zip(messages, suffixes)]
+        else:
+            prompts = [message + suffix for message, suffix in zip(messages, suffixes)]
+        outputs = backend.generate(prompts, {**SAMPLING_PARAMS, "max_tokens": 3, "temperature": 0.0, "stop": SAMPLING_PARAMS["stop"] + ["\n"]})
+
+        repaired = []
+        for feedback, output in zip(feedbacks, outputs):
+            match = re.match(r"\s*(\d{1,2})", output.text)
+            if match and int(match.group(1)) <= 10:
+                repaired.append((f"{feedback.rstrip()}\nPuntuación: {match.group(1)}", int(match.group(1))))
+            else:
+                repaired.append((feedback, np.nan))
+        return repaired
+    
+
+    def judge(
+        self,
+        backend: JudgeBackend,
+        messages: list[str] | list[list[int]],
+        prefix_caching: bool = False,
+        judgment_cache: str | JudgmentCache | None = None,
+        repair_retries: int = 0,
+        repair_sampling_params: dict | None = None,
+        force_score: bool = False,
+        prompt_builder: PromptBuilder | None = None
+    ) -> tuple[list[str], list[int | float], list[Generation], dict[str, int]]:
+        """
+        Judges rendered prompts (text or token IDs): judgment cache lookup, generation, repair rounds and cache writes.
+        `prompt_builder` is needed to extend token ID prompts when `force_score` is set.
+        """
+        feedbacks = [None] * len(messages)
+        scores = [None] * len(messages)
+
+        if judgment_cache is not None:
+            with stage("PrometheusScore", "cache_lookup", rows=len(messages)):
+                cache = get_judgment_cache(judgment_cache)
+                keys = [cache.key(backend.model_name, SAMPLING_PARAMS, message) for message in messages]
+                cached = cache.get_many(keys)
+                for i, key in enumerate(keys):
+                    if key in cached:
+                        feedbacks[i], scores[i] = cached[key]
+                        scores[i] = np.nan if np.isnan(scores[i]) else int(scores[i])
+
+        # Only rows without a cached judgment reach the judge.
+        missing = [i for i, feedback in enumerate(feedbacks) if feedback is None]
+        with stage("PrometheusScore", "generation", rows=len(missing)) as generation:
+            outputs = self.generate(backend, [messages[i] for i in missing], prefix_caching)
+            if generation.enabled:
+                generation.update(**token_counts(outputs))
+        with stage("PrometheusScore", "parse", rows=len(missing)):
+            for i, output in zip(missing, outputs):
+                feedbacks[i] = output.text
+                scores[i] = self.extract_score(output.text)
+
+        # Repair pass: only rows whose score could not be parsed are judged again.
+        unparsed = [i for i, score in enumerate(scores) if np.isnan(score)]
+        retried = set(unparsed)
+        for _ in range(repair_retries):
+            if not unparsed:
+                break
+            with stage("PrometheusScore", "repair", rows=len(unparsed)) as repair:
+                repair_outputs = self.generate(backend, [messages[i] for i in unparsed], prefix_caching, repair_sampling_params)
+                if repair.enabled:
+                    repair.update(**token_counts(repair_outputs))
+            for i, output in zip(unparsed, repair_outputs):
+                score = self.extract_score(output.text)
+                if not np.isnan(score):
+                    feedbacks[i], scores[i] = output.text, score
+            unparsed = [i for i in unparsed if np.isnan(scores[i])]
+
+        if force_score and unparsed:
+            with stage("PrometheusScore", "force_score", rows=len(unparsed)):
+                forced = self.force_scores(backend, [messages[i] for i in unparsed], [feedbacks[i] for i in unparsed], prompt_builder)
+            for i, (feedback, score) in zip(unparsed, forced):
+                feedbacks[i], scores[i] = feedback, score
+            unparsed = [i for i in unparsed if np.isnan(scores[i])]
+
+        if judgment_cache is not None:
+            updated = sorted(set(missing) | retried)
+            if updated:
+                with stage("PrometheusScore", "cache_write", rows=len(updated)):
+                    cache.put_many(backend.model_name, [(keys[i], feedbacks[i], scores[i]) for i in updated])
+
+        counts = {}
+        if repair_retries or force_score:
+            counts["repaired"] = len(retried) - len(unparsed)
+            counts["unparseable"] = len(unparsed)
+        if judgment_cache is not None:
+            counts["cache_hits"] = len(messages) - len(missing)
+            counts["cache_misses"] = len(missing)
+
+        return feedbacks, scores, outputs, counts
+
+
     def _compute(
         self,
         model_name: str,
@@ -182,49 +390,102 @@ class PrometheusScore(evaluate.Metric):
         contexts: list[str],
         previous_conversations: list[list[dict]] = [],
         return_feedbacks: bool = False,
-        return_average: bool = False
-    ) -> list[int] | tuple[list[int], list[str]] | tuple[list[int], float] | tuple[list[int], list[str], float]:
-
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = LLM(model_name)
-        messages = []
-
-        if previous_conversations:
-            for prediction, reference, context, previous_conversation in zip(predictions, references, contexts, previous_conversations):
-                prompt = template.format(
-                    context = context,
-                    previous_conversation = self.format_conversation(previous_conversation),
-                    prediction = prediction,
-                    reference = reference
+        return_average: bool = False,
+        backend: JudgeBackend | None = None,
+        prefix_caching: bool = False,
+        judgment_cache: str | JudgmentCache | None = None,
+        repair_retries: int = 0,
+        repair_sampling_params: dict | None = None,
+        force_score: bool = False,
+        return_stats: bool = False,
+        run_dir: str | None = None,
+        shard_size: int = 1000,
+        pretokenize: bool = False,
+        max_prompt_tokens: int | None = None,
+        context_budget: int | None = None,
+        compression_model: str = DEFAULT_COMPRESSION_MODEL,
+        chunk_tokens: int = 128
+    ) -> list[int] | tuple:
+
+        with stage("PrometheusScore", "tokenizer_load"):
+            tokenizer = load_tokenizer(model_name)
+        if backend is None:
+            # Always the same engine configuration, so calls with and without `prefix_caching` share one registry entry
+            # instead of loading a second engine for the same model.
+            backend = VLLMBackend(model_name, enable_prefix_caching=True)
+
+        compression_stats = {}
+        if context_budget is not None:
+            with stage("PrometheusScore", "context_compression", rows=len(predictions)):
+                last_user_turns = [
+                    next((message["content"] for message in reversed(conversation) if message["role"] == "user"), "")
+                    for conversation in previous_conversations
+                ] or [""] * len(predictions)
+                queries = [f"{turn}\n{prediction}".strip() for turn, prediction in zip(last_user_turns, predictions)]
+                contexts, compression_stats = compress_contexts(
+                    contexts, queries, tokenizer, context_budget, chunk_tokens=chunk_tokens, model_name=compression_model
                 )
 
-                message = tokenizer.apply_chat_template([{"role": "user", "content": prompt}], tokenize=False, add_generation_prompt=True)
-                messages.append(message)
+        with stage("PrometheusScore", "chat_template", rows=len(predictions)):
+            prompt_builder = PromptBuilder(tokenizer, template)
+            if previous_conversations:
+                conversations = [self.format_conversation(previous_conversation) for previous_conversation in previous_conversations]
+            else:
+                conversations = ["No hay conversación previa."] * len(predictions)
+            messages, truncated = prompt_builder.build(
+                {"context": contexts, "previous_conversation": conversations, "prediction": predictions, "reference": references},
+                pretokenize=pretokenize,
+                max_prompt_tokens=max_prompt_tokens,
+                truncatable={"context": "head", "previous_conversation": "tail"},
+            )
+
+        checkpoints = None
+        if run_dir is not None:
+            prompts = [message if isinstance(message, str) else json.dumps(message) for message in messages]
+            fingerprint = RunDirectory.fingerprint([backend.model_name, json.dumps(SAMPLING_PARAMS, sort_keys=True), *prompts])
+            checkpoints = RunDirectory(run_dir, fingerprint, len(messages), shard_size)
+            shards = [checkpoints.shard_rows(shard) for shard in range(checkpoints.num_shards)]
         else:
-            for prediction, reference, context in zip(predictions, references, contexts):
-                prompt = template.format(
-                    context = context,
-                    previous_conversation = "No hay conversación previa.",
-                    prediction = prediction,
-                    reference = reference
-                )
-
-                message = tokenizer.apply_chat_template([{"role": "user", "content": prompt}], tokenize=False, add_generation_prompt=True)
-                messages.append(message)
-        
-        sampling_params = SamplingParams(max_tokens=1024, top_p=0.8, temperature=0.3, repetition_penalty=1.05, min_p= 0.1, stop=["<|eot_id|>", "<|im_end|>"])
-        outputs =  model.generate(messages, sampling_params=sampling_params)
-        feedbacks = [output.outputs[0].text for output in outputs]
-        scores = list(map(self.extract_score, feedbacks))
-
-
+            shards = [range(len(messages))]
+
+        feedbacks = [None] * len(messages)
+        scores = [None] * len(messages)
+        outputs = []
+        counts = {}
+        resumed = 0
+
+        for shard, rows in enumerate(shards):
+            if checkpoints is not None and checkpoints.is_complete(shard):
+                feedbacks[rows.start:rows.stop], scores[rows.start:rows.stop] = checkpoints.load(shard)
+                resumed += 1
+                continue
+
+            shard_feedbacks, shard_scores, shard_outputs, shard_counts = self.judge(
+                backend, messages[rows.start:rows.stop], prefix_caching, judgment_cache, repair_retries, repair_sampling_params,
+                force_score, prompt_builder
+            )
+            feedbacks[rows.start:rows.stop], scores[rows.start:rows.stop] = shard_feedbacks, shard_scores
+            outputs.extend(shard_outputs)
+            for name, value in shard_counts.items():
+                counts[name] = counts.get(name, 0) + value
+            if checkpoints is not None:
+                with stage("PrometheusScore", "checkpoint", rows=len(rows)):
+                    checkpoints.save(shard, shard_feedbacks, shard_scores)
+
+        stats = {"prefix_hit_ratio": prefix_hit_ratio(outputs), **counts}
+        if checkpoints is not None:
+            stats["resumed_shards"] = resumed
+            stats["shards"] = len(shards)
+        if max_prompt_tokens is not None:
+            stats["truncated"] = truncated
+        stats.update(compression_stats)
+
+        results = [scores]
+        if return_feedbacks:
+            results.append(feedbacks)
         if return_average:
-            avg_score = float(np.nanmean(scores))
-            if return_feedbacks:
-                return scores, feedbacks, avg_score
-            else:
-                return scores, avg_score
-        elif return_feedbacks:
-            return scores, feedbacks
+            results.append(float(np.nanmean(scores)))
+        if return_stats:
+            results.append(stats)
 
-        return scores
\ No newline at end of file
+        return tuple(results) if len(results) > 1 else scores
\ No newline at end of file
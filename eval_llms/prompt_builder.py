@@ -0,0 +1,139 @@
+import re
+import string
+
+
+
+# Stand-in for a field while the chat template is rendered once; must survive the template unchanged.
+PLACEHOLDER = "<<eval_llms:{}>>"
+
+
+
+def share_budget(lengths: list[int], budget: int) -> list[int]:
+    """
+    Number of tokens kept from each field so that together they fit in `budget`. The budget is split equally and the unused
+    share of the fields shorter than their share goes to the longer ones.
+    """
+    keep = [0] * len(lengths)
+    remaining = max(budget, 0)
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    for k, i in enumerate(order):
+        keep[i] = min(lengths[i], remaining // (len(order) - k))
+        remaining -= keep[i]
+    return keep
+
+
+
+class PromptBuilder:
+    """
+    Renders the judge prompts of many rows from a `str.format` template wrapped in the tokenizer's chat template.
+
+    The chat template is applied once to the template with a placeholder per field, which splits every prompt into fixed
+    segments around the field values. Rows are then rendered by joining segments and values: as text, or as token IDs where
+    the fixed segments are tokenized once and each field with one batched tokenizer call. If the chat template alters the
+    placeholders (a probe rendered both ways differs), rows fall back to one `apply_chat_template` call each.
+    """
+
+    def __init__(self, tokenizer, template: str):
+        self.tokenizer = tokenizer
+        self.template = template
+        # Fields in order of appearance, repeated if a field appears several times.
+        self.fields = [name for _, name, _, _ in string.Formatter().parse(template) if name]
+
+        placeholders = {name: PLACEHOLDER.format(name) for name in self.fields}
+        pieces = re.split("(" + "|".join(map(re.escape, placeholders.values())) + ")", self.render(placeholders))
+        self.segments = pieces[0::2]
+
+        probe = {name: f"probe {i}" for i, name in enumerate(dict.fromkeys(self.fields))}
+        if pieces[1::2] != [placeholders[name] for name in self.fields] or self.join(probe) != self.render(probe):
+            self.segments = None
+
+        if self.segments is not None:
+            self.segment_ids = self.tokenize(self.segments)
+            self.fixed_tokens = sum(map(len, self.segment_ids))
+        else:
+            self.fixed_tokens = len(self.tokenize([self.render({name: "" for name in self.fields})])[0])
+
+
+    def render(self, values: dict[str, str]) -> str:
+        prompt = self.template.format(**values)
+        return self.tokenizer.apply_chat_template([{"role": "user", "content": prompt}], tokenize=False, add_generation_prompt=True)
+
+
+    def join(self, values: dict[str, str]) -> str:
+        parts = [self.segments[0]]
+        for name, segment in zip(self.fields, self.segments[1:]):
+            parts.append(values[name])
+            parts.append(segment)
+        return "".join(parts)
+
+
+    def tokenize(self, texts: list[str]) -> list[list[int]]:
+        if not texts:
+            return []
+        return self.tokenizer(list(texts), add_special_tokens=False)["input_ids"]
+
+
+    def extend(self, prompt: str | list[int], text: str) -> str | list[int]:
+        """Appends `text` to a rendered prompt, tokenizing it if the prompt is token IDs."""
+        if isinstance(prompt, str):
+            return prompt + text
+        return prompt + self.tokenize([text])[0]
+
+
+    def build(
+        self,
+        values: dict[str, list[str]],
+        pretokenize: bool = False,
+        max_prompt_tokens: int | None = None,
+        truncatable: dict[str, str] | None = None,
+    ) -> tuple[list[str] | list[list[int]], int]:
+        """
+        Renders one prompt per row from the column of values of every field.
+
+        With `max_prompt_tokens`, rows whose prompt is longer are shortened by cutting the fields in `truncatable`, a mapping of
+        field name to the part that is kept: "head" (the first tokens) or "tail" (the last tokens). The remaining budget is
+        shared between those fields. Returns the prompts (strings, or token ID lists with `pretokenize=True`) and the number of
+        truncated rows.
+        """
+        truncatable = truncatable or {}
+        for name, side in truncatable.items():
+            if side not in ("head", "tail"):
+                raise ValueError(f"Unsupported truncation side {side} for {name}, expected 'head' or 'tail'.")
+        num_rows = len(values[self.fields[0]]) if self.fields else 0
+        names = list(dict.fromkeys(self.fields))
+        values = {name: list(values[name]) for name in names}
+
+        field_ids = None
+        if pretokenize or max_prompt_tokens is not None:
+            field_ids = {name: self.tokenize(values[name]) for name in names}
+
+        truncated = 0
+        if max_prompt_tokens is not None:
+            for i in range(num_rows):
+                total = self.fixed_tokens + sum(len(field_ids[name][i]) for name in self.fields)
+                if total <= max_prompt_tokens:
+                    continue
+                truncated += 1
+                lengths = [len(field_ids[name][i]) for name in truncatable]
+                keep = share_budget(lengths, max_prompt_tokens - total + sum(lengths))
+                for (name, side), length, kept in zip(truncatable.items(), lengths, keep):
+                    ids = field_ids[name][i]
+                    field_ids[name][i] = ids[:kept] if side == "head" else ids[length - kept:]
+                    values[name][i] = self.tokenizer.decode(field_ids[name][i])
+
+        if self.segments is not None and pretokenize:
+            prompts = []
+            for i in range(num_rows):
+                ids = list(self.segment_ids[0])
+                for name, segment_ids in zip(self.fields, self.segment_ids[1:]):
+                    ids.extend(field_ids[name][i])
+                    ids.extend(segment_ids)
+                prompts.append(ids)
+            return prompts, truncated
+
+        rows = [{name: values[name][i] for name in names} for i in range(num_rows)]
+        if self.segments is not None:
+            prompts = [self.join(row) for row in rows]
+        else:
+            prompts = [self.render(row) for row in rows]
+        return (self.tokenize(prompts) if pretokenize else prompts), truncated
@@ -0,0 +1,181 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple
+
+
+
+class ModelKey(NamedTuple):
+    model_name: str
+    device: str
+    dtype: str
+    backend: str
+
+
+
+def estimate_model_size(model: Any) -> int:
+    """Approximate memory footprint in bytes of a torch-backed model (parameters plus buffers)."""
+    module = model if hasattr(model, "parameters") else getattr(model, "model", None)
+    if module is None or not hasattr(module, "parameters"):
+        return 0
+
+    size = sum(param.numel() * param.element_size() for param in module.parameters())
+    size += sum(buffer.numel() * buffer.element_size() for buffer in module.buffers())
+    return size
+
+
+
+class ModelRegistry:
+    """
+    Thread-safe, process-wide LRU store of loaded models.
+
+    Models are keyed by (model name, device, dtype, backend). When the summed size of the
+    loaded models exceeds `max_memory_bytes`, the least recently used models are evicted.
+    A budget of None means the registry is unbounded.
+    """
+
+    def __init__(self, max_memory_bytes: int | None = None):
+        self._max_memory_bytes = max_memory_bytes
+        self._entries: OrderedDict[ModelKey, tuple[Any, int]] = OrderedDict()
+        self._loading: dict[ModelKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+    @property
+    def max_memory_bytes(self) -> int | None:
+        return self._max_memory_bytes
+
+
+    @max_memory_bytes.setter
+    def max_memory_bytes(self, value: int | None):
+        with self._lock:
+            self._max_memory_bytes = value
+            evicted = self._evict()
+        self._release(evicted)
+
+
+    @property
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._entries.values())
+
+
+    def get(
+        self,
+        model_name: str,
+        loader: Callable[[], Any],
+        device: str = "cpu",
+        dtype: str = "auto",
+        backend: str = "torch",
+        size_fn: Callable[[Any], int] = estimate_model_size,
+    ) -> Any:
+        key = ModelKey(model_name, device, str(dtype), backend)
+
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            key_lock = self._loading.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given key; other threads asking for it wait and then hit.
+        with key_lock:
+            with self._lock:
+                if key in self._entries:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return self._entries[key][0]
+                self.misses += 1
+
+            model = loader()
+            size = size_fn(model)
+
+            with self._lock:
+                self._entries[key] = (model, size)
+                self._loading.pop(key, None)
+                evicted = self._evict()
+
+        self._release(evicted)
+        return model
+
+
+    def __contains__(self, key: ModelKey) -> bool:
+        with self._lock:
+            return key in self._entries
+
+
+    def keys(self) -> list[ModelKey]:
+        with self._lock:
+            return list(self._entries)
+
+
+    def evict(self, key: ModelKey) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.evictions += 1
+        if entry is not None:
+            self._release([entry[0]])
+        return entry is not None
+
+
+    def clear(self):
+        with self._lock:
+            models = [model for model, _ in self._entries.values()]
+            self._entries.clear()
+        self._release(models)
+
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "models": len(self._entries),
+                "memory_bytes": sum(size for _, size in self._entries.values()),
+                "max_memory_bytes": self._max_memory_bytes,
+            }
+
+
+    def _evict(self) -> list[Any]:
+        # Must be called with the lock held. The most recently used entry is never evicted,
+        # so a single model larger than the budget stays usable.
+        evicted = []
+        if self._max_memory_bytes is None:
+            return evicted
+
+        total = sum(size for _, size in self._entries.values())
+        while total > self._max_memory_bytes and len(self._entries) > 1:
+            _, (model, size) = self._entries.popitem(last=False)
+            total -= size
+            self.evictions += 1
+            evicted.append(model)
+        return evicted
+
+
+    def _release(self, models: list[Any]):
+        for model in models:
+            close = getattr(model, "close", None)
+            if callable(close):
+                close()
+
+
+
+def _default_budget() -> int | None:
+    value = os.environ.get("EVAL_LLMS_MODEL_REGISTRY_MAX_BYTES")
+    return int(value) if value else None
+
+
+
+model_registry = ModelRegistry(max_memory_bytes=_default_budget())
@@ -0,0 +1,157 @@
+import numpy as np
+from .embedding_cache import EmbeddingCache
+from .judges import JudgeBackend
+from .judgment_cache import JudgmentCache
+from .streaming import DEFAULT_COLUMNS, open_sink
+from .utils import is_cross_encoder
+
+
+
+METRICS = ["accuracy", "bi_encoder", "sas", "sas_ensemble", "prometheus"]
+# Every metric that runs without a judge model.
+DEFAULT_METRICS = ["accuracy", "bi_encoder", "sas", "sas_ensemble"]
+DEFAULT_BI_ENCODER = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+DEFAULT_CROSS_ENCODER = "cross-encoder/stsb-roberta-large"
+DEFAULT_ENSEMBLE = [DEFAULT_BI_ENCODER, DEFAULT_CROSS_ENCODER]
+
+
+
+def read_table(path: str, column_mapping: dict[str, str] | None = None) -> dict[str, list]:
+    """Reads a JSONL or Parquet file once and returns its columns keyed by metric argument name."""
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(path)
+    elif path.endswith((".jsonl", ".json")):
+        import pyarrow.json
+
+        table = pyarrow.json.read_json(path)
+    else:
+        raise ValueError(f"Unsupported input format for {path}, expected a .jsonl or .parquet file.")
+
+    column_mapping = column_mapping or DEFAULT_COLUMNS
+    columns = table.column_names
+    data = {name: table.column(column).to_pylist() for name, column in column_mapping.items() if column in columns}
+    if "predictions" not in data or "references" not in data:
+        raise ValueError(f"{path} needs the columns {column_mapping['predictions']!r} and {column_mapping['references']!r}.")
+    return data
+
+
+
+def plan_models(
+    metrics: list[str],
+    bi_encoder: str = DEFAULT_BI_ENCODER,
+    cross_encoder: str = DEFAULT_CROSS_ENCODER,
+    ensemble: list[str] | None = None,
+) -> dict[str, bool]:
+    """
+    Returns every similarity model needed by `metrics`, each listed once, mapped to whether it is a cross-encoder.
+
+    The standalone bi-encoder and cross-encoder and the ensemble members are pooled, so a checkpoint shared by several
+    metrics is loaded and run a single time.
+    """
+    models = []
+    if "bi_encoder" in metrics:
+        models.append(bi_encoder)
+    if "sas" in metrics:
+        models.append(cross_encoder)
+    if "sas_ensemble" in metrics:
+        models.extend(ensemble or DEFAULT_ENSEMBLE)
+
+    plan = {model_name: is_cross_encoder(model_name) for model_name in dict.fromkeys(models)}
+    if "bi_encoder" in metrics and plan[bi_encoder]:
+        raise ValueError(f"{bi_encoder} is a cross-encoder, pass it as the cross-encoder instead.")
+    if "sas" in metrics and not plan[cross_encoder]:
+        raise ValueError(f"{cross_encoder} is not a cross-encoder.")
+    return plan
+
+
+
+def run_metrics(
+    data: dict[str, list],
+    metrics: list[str] | None = None,
+    bi_encoder: str = DEFAULT_BI_ENCODER,
+    cross_encoder: str = DEFAULT_CROSS_ENCODER,
+    ensemble: list[str] | None = None,
+    ensemble_weights: list[float] | None = None,
+    judge: str | None = None,
+    judge_backend: JudgeBackend | None = None,
+    batch_size: int = 64,
+    embedding_cache: str | EmbeddingCache | None = None,
+    judgment_cache: str | JudgmentCache | None = None,
+    backend: str = "torch",
+    quantize: bool = False,
+) -> dict[str, list]:
+    """
+    Scores `data` (metric argument name to list of values) with several metrics in one pass and returns the input columns
+    followed by one score column per metric. `metrics` defaults to `DEFAULT_METRICS`; "prometheus" also needs `judge`.
+
+    Every similarity model is run once on the whole table: the `sas_ensemble` column is the weighted average of the
+    scores already computed for its members instead of a second run of the same checkpoints.
+    """
+    from .accuracy import Accuracy
+    from .biencoder import BiEncoderScore
+    from .prometheus import PrometheusScore
+    from .sas import SemanticAnswerSimilarity
+
+    metrics = DEFAULT_METRICS if metrics is None else metrics
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics {sorted(unknown)}, expected some of {METRICS}.")
+
+    predictions, references = data["predictions"], data["references"]
+    results = dict(data)
+
+    if "accuracy" in metrics:
+        results["accuracy"] = Accuracy().score(predictions, references)
+
+    model_scores = {}
+    for model_name, cross_encoder_model in plan_models(metrics, bi_encoder, cross_encoder, ensemble).items():
+        if cross_encoder_model:
+            model_scores[model_name] = SemanticAnswerSimilarity().score(
+                predictions, references, model_name=model_name, batch_size=batch_size, backend=backend, quantize=quantize
+            )
+        else:
+            model_scores[model_name] = BiEncoderScore().score(
+                predictions, references, model_name=model_name, batch_size=batch_size, embedding_cache=embedding_cache,
+                backend=backend, quantize=quantize
+            )
+
+    if "bi_encoder" in metrics:
+        results["bi_encoder"] = model_scores[bi_encoder]
+    if "sas" in metrics:
+        results["sas"] = model_scores[cross_encoder]
+    if "sas_ensemble" in metrics:
+        members = np.array([model_scores[model_name] for model_name in ensemble or DEFAULT_ENSEMBLE], dtype=np.float64)
+        results["sas_ensemble"] = np.average(members, axis=0, weights=ensemble_weights).tolist()
+
+    if "prometheus" in metrics:
+        if judge is None:
+            raise ValueError("The prometheus metric needs a judge model name.")
+        if "contexts" not in data:
+            raise ValueError("The prometheus metric needs a context column.")
+        results["prometheus"], results["prometheus_feedback"] = PrometheusScore().score(
+            predictions, references, model_name=judge, contexts=data["contexts"],
+            previous_conversations=data.get("previous_conversations", []), backend=judge_backend,
+            judgment_cache=judgment_cache, return_feedbacks=True
+        )
+
+    return results
+
+
+
+def summarize(results: dict[str, list]) -> dict[str, float]:
+    """Mean of every score column, ignoring unparseable (NaN) judge scores."""
+    return {
+        metric: float(np.nanmean(np.asarray(results[metric], dtype=np.float64)))
+        for metric in METRICS if metric in results
+    }
+
+
+
+def write_table(results: dict[str, list], path: str):
+    sink = open_sink(path)
+    try:
+        sink.write(results)
+    finally:
+        sink.close()
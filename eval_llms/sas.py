@@ -1,9 +1,15 @@
-import torch
 import datasets
 import evaluate
 import numpy as np
-from transformers import AutoConfig
-from sentence_transformers import CrossEncoder
+from typing import TYPE_CHECKING
+from .batching import run_batched, token_lengths
+from .instrumentation import stage
+from .onnx_export import load_onnx_model, onnx_model_size
+from .registry import model_registry
+from .utils import aggregate_segments, dedup_ratio, deduplicate, DirectScoring, flatten_references, get_device, is_cross_encoder
+
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
 
 
 
@@ -32,15 +38,28 @@ Compute Semantic Answer Similarity with a Cross Encoder.
 
 Args:
     predictions: list of strings. The predicted answers or sentences.
-    references: list of strings. The correct reference answers or sentences.
+    references: list of strings, or list of lists of strings. The correct reference answers or sentences; with several acceptable
+        references per prediction, each prediction is scored against all of them and the similarities are aggregated.
     model_name: string, optional (default="cross-encoder/stsb-roberta-large"). The name of the Cross Encoder model to be used.
     batch_size: int, optional (default=64). The batch size to use for embedding computation.
     return_average: bool, optional (default=False). If True, returns both the similarity scores and the average similarity score.
+    max_tokens_per_batch: int, optional (default=None). If given, pairs are sorted by token length and grouped into batches of
+        at most this many (padded) tokens instead of `batch_size` rows. The lengths cost an extra tokenizer pass, since the
+        model tokenizes every batch again when scoring it.
+    backend: string, optional (default="torch"). Inference backend, "torch" or "onnx". The ONNX backend runs on CPU with
+        ONNX Runtime (requires the `onnx` extra, `optimum[onnxruntime]`); the graph is exported once per model and cached locally.
+    quantize: bool, optional (default=False). With the ONNX backend, use a dynamically int8-quantized graph.
+    return_stats: bool, optional (default=False). If True, also returns a dictionary of run statistics:
+        - dedup_ratio: fraction of the prediction-reference pairs that were duplicates and were not scored again.
+    reference_aggregation: string, optional (default="max"). How the scores of a prediction against its several references are
+        combined, "max" or "mean". A prediction with an empty list of references scores NaN
+        and is left out of the average.
 
 Returns:
     list of float or tuple of (list of float, float):
         - If return_average is False, returns a list of similarity scores between the prediction and reference pairs.
         - If return_average is True, returns a tuple containing the list of similarity scores and the average similarity score.
+        - If return_stats is True, the statistics dictionary is appended as the last element of the returned tuple.
 
 Examples:
 
@@ -56,19 +75,51 @@ Examples:
 
 
 
+def load_cross_encoder(model_name: str, device: str, backend: str = "torch", quantize: bool = False) -> "CrossEncoder":
+    from sentence_transformers import CrossEncoder
+
+    if backend == "onnx":
+        return model_registry.get(
+            model_name,
+            lambda: load_onnx_model(CrossEncoder, model_name, quantize=quantize),
+            device="cpu",
+            dtype="qint8" if quantize else "float32",
+            backend="cross-encoder-onnx",
+            size_fn=lambda model: onnx_model_size(CrossEncoder, model_name, quantize=quantize),
+        )
+    if backend != "torch":
+        raise ValueError(f"Unsupported backend {backend}, expected 'torch' or 'onnx'.")
+
+    return model_registry.get(
+        model_name,
+        lambda: CrossEncoder(model_name, device=device),
+        device=device,
+        backend="cross-encoder",
+    )
+
+
+
 @evaluate.utils.file_utils.add_start_docstrings(_DESCRIPTION, _KWARGS_DESCRIPTION)
-class SemanticAnswerSimilarity(evaluate.Metric):
+class SemanticAnswerSimilarity(DirectScoring, evaluate.Metric):
     def _info(self):
         return evaluate.MetricInfo(
             description=_DESCRIPTION,
             citation=_CITATION,
             inputs_description=_KWARGS_DESCRIPTION,
-            features=datasets.Features(
-                {
-                    "predictions": datasets.Value(dtype="string"),
-                    "references": datasets.Value(dtype="string"),
-                },
-            ),
+            features=[
+                datasets.Features(
+                    {
+                        "predictions": datasets.Value(dtype="string"),
+                        "references": datasets.Sequence(datasets.Value(dtype="string")),
+                    },
+                ),
+                datasets.Features(
+                    {
+                        "predictions": datasets.Value(dtype="string"),
+                        "references": datasets.Value(dtype="string"),
+                    },
+                ),
+            ],
             reference_urls=["https://arxiv.org/abs/2108.06130"],
         )
 
@@ -80,27 +131,45 @@ class SemanticAnswerSimilarity(evaluate.Metric):
         model_name: str = "cross-encoder/stsb-roberta-large",
         return_average: bool = False,
         batch_size: int = 64, 
-    ) -> list[float] | tuple[list[float], float]:
+        max_tokens_per_batch: int | None = None,
+        backend: str = "torch",
+        quantize: bool = False,
+        return_stats: bool = False,
+        reference_aggregation: str = "max",
+    ) -> list[float] | tuple[list[float], float] | tuple[list[float], dict] | tuple[list[float], float, dict]:
         
-        model_config = AutoConfig.from_pretrained(model_name)
-        if model_config.architectures:
-            is_cross_encoder = any(architectures.endswith("ForSequenceClassification") for architectures in model_config.architectures)
-
-        if not is_cross_encoder:
+        with stage("SemanticAnswerSimilarity", "config"):
+            cross_encoder = is_cross_encoder(model_name)
+        if not cross_encoder:
             print(f"Invalid model architecture, {model_name} is not a cross-encoder.")
             return
         
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model = CrossEncoder(model_name, device=device)
-        pairs = []
-        
-        for prediction, reference in zip(predictions, references):
-            pairs.append([prediction, reference])
+        with stage("SemanticAnswerSimilarity", "model_load"):
+            model = load_cross_encoder(model_name, get_device(), backend=backend, quantize=quantize)
+        # Several references per prediction become one (prediction, reference) pair each, all scored in the same batches.
+        references, reference_counts = flatten_references(references)
+        with stage("SemanticAnswerSimilarity", "deduplicate", rows=len(references)):
+            pairs, inverse = deduplicate(list(zip(np.repeat(np.asarray(predictions, dtype=object), reference_counts), references)))
         
-        scores = model.predict(pairs, batch_size=batch_size).tolist()
+        if not pairs:
+            unique_scores = np.empty(0)
+        elif max_tokens_per_batch is None:
+            with stage("SemanticAnswerSimilarity", "predict", rows=len(pairs)):
+                unique_scores = model.predict([list(pair) for pair in pairs], batch_size=batch_size)
+        else:
+            with stage("SemanticAnswerSimilarity", "tokenize", rows=len(pairs)):
+                lengths = token_lengths(model.tokenizer, [pair[0] for pair in pairs], [pair[1] for pair in pairs], model.max_length)
+            with stage("SemanticAnswerSimilarity", "predict", rows=len(pairs)):
+                unique_scores = run_batched(
+                    lengths,
+                    max_tokens_per_batch,
+                    lambda batch: model.predict([list(pairs[i]) for i in batch], batch_size=len(batch)),
+                )
+        scores = aggregate_segments(np.asarray(unique_scores)[inverse], reference_counts, reference_aggregation).tolist()
+        stats = {"dedup_ratio": dedup_ratio(len(inverse), len(pairs))}
         
         if return_average:
-            avg_score = float(np.mean(scores))
-            return scores, avg_score
+            avg_score = float(np.nanmean(scores))
+            return (scores, avg_score, stats) if return_stats else (scores, avg_score)
         
-        return scores
+        return (scores, stats) if return_stats else scores
@@ -1,10 +1,12 @@
-import torch
 import datasets
 import evaluate
 import numpy as np
-from transformers import AutoConfig
+from concurrent.futures import ThreadPoolExecutor
 from .sas import SemanticAnswerSimilarity
 from .biencoder import BiEncoderScore
+from .embedding_cache import EmbeddingCache
+from .instrumentation import stage
+from .utils import DirectScoring, is_cross_encoder
 
 
 
@@ -33,15 +35,34 @@ Compute Ensemble of Semantic Answer Similarity and BiEncoder metric.
 
 Args:
     predictions: list of strings. The predicted answers or sentences.
-    references: list of strings. The correct reference answers or sentences.
+    references: list of strings, or list of lists of strings. The correct reference answers or sentences, one or several per prediction.
     model_names: list of strings. The list of cross-encoder and/or bi-encoder model names or paths to be used for ensemble evaluation.
     batch_size: int, optional (default=64). The batch size to use for embedding computation.
     return_average: bool, optional (default=False). If True, returns both the individual model scores and the average score.
+    embedding_cache: string or EmbeddingCache, optional (default=None). On-disk embedding cache shared by the bi-encoder members.
+    weights: list of floats, optional (default=None). Weight of each model in `model_names` for the weighted average. Equal weights if None.
+    max_workers: int, optional (default=None). Number of threads running ensemble members concurrently. Defaults to one per model.
+    backend: string, optional (default="torch"). Inference backend of every member, "torch" or "onnx" (CPU, ONNX Runtime).
+    quantize: bool, optional (default=False). With the ONNX backend, use dynamically int8-quantized graphs.
+    return_member_scores: bool, optional (default=False). If True, also returns the per-member score matrix as a NumPy array
+        of shape (len(model_names), len(predictions)), so the ensemble can be re-weighted without re-running the models.
+    cascade_band: tuple of two floats, optional (default=None). Cascade mode: the bi-encoder members score every pair first and only
+        pairs whose (weighted) bi-encoder score lies inside [low, high] reach the cross-encoder members. For the other pairs the
+        cross-encoder score is estimated with a linear calibration fitted on the pairs that were scored by both.
+    calibration_size: int, optional (default=64). In cascade mode, number of pairs outside the band that are still sent to the
+        cross-encoders so the calibration also covers clear-cut scores.
+    return_stats: bool, optional (default=False). If True, also returns a dictionary with, in cascade mode, the fraction of pairs
+        that skipped the cross-encoders (short_circuit_ratio) and the (slope, intercept) calibration of each cross-encoder member.
+    reference_aggregation: string, optional (default="max"). With several references per prediction, how every member combines
+        the scores against each reference, "max" or "mean". A prediction with an empty list of references scores NaN and is left
+        out of the average.
 
 Returns:
     list of float or tuple of (list of float, float):
         - If return_average is False, returns a list of average similarity scores from the ensemble models.
         - If return_average is True, returns a tuple containing the list of similarity scores and the average similarity score.
+        - If return_member_scores is True, the member score matrix follows the list of similarity scores in the returned tuple.
+        - If return_stats is True, the statistics dictionary is the last element of the returned tuple.
 
 Examples:
 
@@ -49,7 +70,7 @@ Examples:
     >>> predictions = ["El sol está en el cielo.", "Las bicicletas son buenas para el ambiente.", "El café es adictivo."]
     >>> models = ["sentence-transformers/paraphrase-multilingual-mpnet-base-v2", "cross-encoder/stsb-roberta-large"]
     >>> metric = SASEnsemble()
-    >>> scores, avg_score = metric.compute(models=models, predictions=predictions, references=references, batch_size=4)
+    >>> scores, avg_score = metric.compute(model_names=models, predictions=predictions, references=references, batch_size=4)
     >>> print(scores)
     [0.9336, 0.7649, 0.7458]
     >>> print(avg_score)
@@ -59,18 +80,26 @@ Examples:
 
 
 @evaluate.utils.file_utils.add_start_docstrings(_DESCRIPTION, _KWARGS_DESCRIPTION)
-class SASEnsemble(evaluate.Metric):
+class SASEnsemble(DirectScoring, evaluate.Metric):
     def _info(self):
         return evaluate.MetricInfo(
             description=_DESCRIPTION,
             citation=_CITATION,
             inputs_description=_KWARGS_DESCRIPTION,
-            features=datasets.Features(
-                {
-                    "predictions": datasets.Value(dtype="string"),
-                    "references": datasets.Value(dtype="string"),
-                },
-            ),
+            features=[
+                datasets.Features(
+                    {
+                        "predictions": datasets.Value(dtype="string"),
+                        "references": datasets.Sequence(datasets.Value(dtype="string")),
+                    },
+                ),
+                datasets.Features(
+                    {
+                        "predictions": datasets.Value(dtype="string"),
+                        "references": datasets.Value(dtype="string"),
+                    },
+                ),
+            ],
             reference_urls=["https://arxiv.org/abs/2108.06130"],
         )
 
@@ -81,29 +110,132 @@ class SASEnsemble(evaluate.Metric):
         predictions: list[str], 
         references: list[str],
         return_average: bool = False,
-        batch_size: int = 64
-    ) -> list[float] | tuple[list[float], float]:
+        batch_size: int = 64,
+        embedding_cache: str | EmbeddingCache | None = None,
+        weights: list[float] | None = None,
+        max_workers: int | None = None,
+        backend: str = "torch",
+        quantize: bool = False,
+        return_member_scores: bool = False,
+        cascade_band: tuple[float, float] | None = None,
+        calibration_size: int = 64,
+        return_stats: bool = False,
+        reference_aggregation: str = "max"
+    ) -> list[float] | tuple:
         
-        metric_scores = []
+        if weights is not None and len(weights) != len(model_names):
+            raise ValueError(f"Expected {len(model_names)} weights, got {len(weights)}.")
+
+        # Architectures are resolved once per checkpoint and cached for the whole process.
+        with stage("SASEnsemble", "config"):
+            cross_encoders = [is_cross_encoder(model_name) for model_name in model_names]
+
+        def score_member(model_name: str, cross_encoder: bool, rows: np.ndarray | None = None) -> list[float]:
+            member_predictions = predictions if rows is None else [predictions[i] for i in rows]
+            member_references = references if rows is None else [references[i] for i in rows]
+            if cross_encoder:
+                return SemanticAnswerSimilarity().score(
+                    predictions=member_predictions, references=member_references, model_name=model_name, batch_size=batch_size,
+                    backend=backend, quantize=quantize, reference_aggregation=reference_aggregation
+                )
+            return BiEncoderScore().score(
+                predictions=member_predictions, references=member_references, model_name=model_name, batch_size=batch_size, embedding_cache=embedding_cache,
+                backend=backend, quantize=quantize, reference_aggregation=reference_aggregation
+            )
+
+        stats = {}
+        with stage("SASEnsemble", "members", rows=len(predictions)):
+            with ThreadPoolExecutor(max_workers=max_workers or max(len(model_names), 1)) as executor:
+                if cascade_band is None:
+                    member_scores = np.array(list(executor.map(score_member, model_names, cross_encoders)), dtype=np.float64)
+                else:
+                    member_scores, stats = self.cascade(
+                        executor, score_member, model_names, cross_encoders, weights, cascade_band, calibration_size, len(predictions)
+                    )
+
+        with stage("SASEnsemble", "aggregate", rows=len(predictions)):
+            scores = np.average(member_scores, axis=0, weights=weights).tolist()
+        
+        results = [scores]
+        if return_member_scores:
+            results.append(member_scores)
+        if return_average:
+            results.append(float(np.nanmean(scores)))
+        if return_stats:
+            results.append(stats)
+
+        return tuple(results) if len(results) > 1 else scores
+
+
+    def cascade(
+        self,
+        executor: ThreadPoolExecutor,
+        score_member,
+        model_names: list[str],
+        cross_encoders: list[bool],
+        weights: list[float] | None,
+        band: tuple[float, float],
+        calibration_size: int,
+        num_rows: int,
+    ) -> tuple[np.ndarray, dict]:
+        """
+        Runs the bi-encoder members on every row and the cross-encoder members only on rows whose bi-encoder score falls
+        inside `band`, plus a fixed random sample of the other rows used to fit a linear calibration. Cross-encoder scores
+        of the short-circuited rows are estimated from their bi-encoder score with that calibration.
+        """
+        bi_members = [i for i, cross_encoder in enumerate(cross_encoders) if not cross_encoder]
+        cross_members = [i for i, cross_encoder in enumerate(cross_encoders) if cross_encoder]
+        if not bi_members or not cross_members:
+            raise ValueError("A cascade needs at least one bi-encoder and one cross-encoder in model_names.")
+
+        member_scores = np.empty((len(model_names), num_rows), dtype=np.float64)
+        for i, member in zip(bi_members, executor.map(score_member, [model_names[i] for i in bi_members], [False] * len(bi_members))):
+            member_scores[i] = member
+        bi_weights = None if weights is None else [weights[i] for i in bi_members]
+        bi_scores = np.average(member_scores[bi_members], axis=0, weights=bi_weights)
+
+        # Rows without a bi-encoder score (no references) skip the cross-encoders and the calibration and stay NaN.
+        low, high = band
+        scored = np.isfinite(bi_scores)
+        uncertain = scored & (bi_scores >= low) & (bi_scores <= high)
+        confident = np.flatnonzero(scored & ~uncertain)
+        rng = np.random.default_rng(0)
+        calibration = rng.choice(confident, size=min(calibration_size, len(confident)), replace=False)
+        rows = np.sort(np.concatenate([np.flatnonzero(uncertain), calibration]))
+
+        if len(rows):
+            cross_scores = executor.map(
+                score_member, [model_names[i] for i in cross_members], [True] * len(cross_members), [rows] * len(cross_members)
+            )
+        else:
+            cross_scores = [[] for _ in cross_members]
+        skipped = np.setdiff1d(np.flatnonzero(scored), rows)
+        fits = []
+        for i, member in zip(cross_members, cross_scores):
+            member = np.asarray(member, dtype=np.float64)
+            slope, intercept = fit_calibration(bi_scores[rows], member)
+            member_scores[i] = np.nan
+            member_scores[i, rows] = member
+            # Clip to the range actually observed, so the line is never extrapolated past what the cross-encoder produced.
+            if np.isfinite(member).any():
+                member_scores[i, skipped] = np.clip(slope * bi_scores[skipped] + intercept, np.nanmin(member), np.nanmax(member))
+            else:
+                member_scores[i, skipped] = bi_scores[skipped]
+            fits.append((slope, intercept))
 
-        for model_name in model_names:
-            model_config = AutoConfig.from_pretrained(model_name)
+        stats = {"short_circuit_ratio": len(skipped) / num_rows if num_rows else 0.0, "calibration": fits}
+        return member_scores, stats
 
-            if model_config.architectures:
-                is_cross_encoder = any(architectures.endswith("ForSequenceClassification") for architectures in model_config.architectures)
 
-            if is_cross_encoder:
-                metric = SemanticAnswerSimilarity(model_name=model_name)
-            else:
-                metric = BiEncoderScore(model_name=model_name)
 
-            scores = metric.compute(predictions=predictions, references=references, batch_size=batch_size)
-            metric_scores.append(scores)
-        
-        scores = np.mean(np.array(metric_scores), axis=0).tolist()
-        
-        if return_average:
-            avg_score = float(np.mean(scores))
-            return scores, avg_score
-        
-        return scores
+def fit_calibration(x: np.ndarray, y: np.ndarray) -> tuple[float, float]:
+    """
+    Least-squares line mapping bi-encoder scores `x` to cross-encoder scores `y`, ignoring non-finite pairs; the identity
+    without enough spread.
+    """
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return 1.0, 0.0
+    slope, intercept = np.polyfit(x, y, 1)
+    return float(slope), float(intercept)
@@ -0,0 +1,193 @@
+import inspect
+import json
+import math
+from itertools import islice
+from typing import Any, Iterable, Iterator
+import numpy as np
+
+
+
+DEFAULT_COLUMNS = {
+    "predictions": "prediction",
+    "references": "reference",
+    "contexts": "context",
+    "previous_conversations": "previous_conversation",
+}
+
+
+
+class RunningAggregate:
+    """Mean, nan-mean and counts updated chunk by chunk, so no per-row scores have to be kept."""
+
+    def __init__(self):
+        self.count = 0
+        self.nan_count = 0
+        self.total = 0.0
+
+
+    def update(self, scores: Iterable[float]):
+        values = np.asarray(list(scores), dtype=np.float64)
+        nans = np.isnan(values)
+        self.count += values.size
+        self.nan_count += int(nans.sum())
+        self.total += float(values[~nans].sum())
+
+
+    @property
+    def mean(self) -> float:
+        if self.nan_count or not self.count:
+            return math.nan
+        return self.total / self.count
+
+
+    @property
+    def nanmean(self) -> float:
+        valid = self.count - self.nan_count
+        return self.total / valid if valid else math.nan
+
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "nan_count": self.nan_count, "mean": self.mean, "nanmean": self.nanmean}
+
+
+
+class JsonlSink:
+    def __init__(self, path: str):
+        self.file = open(path, "w", encoding="utf-8")
+
+
+    def write(self, rows: dict[str, list]):
+        for values in zip(*rows.values()):
+            record = {column: _to_json(value) for column, value in zip(rows, values)}
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+
+    def close(self):
+        self.file.close()
+
+
+
+class ParquetSink:
+    """
+    Parquet file written chunk by chunk. The schema is fixed by the first chunk: columns listed in `types` (pyarrow type
+    aliases such as "int64", "float64", "string") get that type, the others their inferred type, and a column that is
+    entirely null in the first chunk (e.g. NaN scores) is stored as float64 so that later chunks can still be cast to it.
+    """
+
+    def __init__(self, path: str, types: dict[str, str] | None = None):
+        self.path = path
+        self.types = types or {}
+        self.writer = None
+
+
+    def write(self, rows: dict[str, list]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.table({column: [_to_json(value) for value in values] for column, values in rows.items()})
+        if self.writer is None:
+            fields = []
+            for field in table.schema:
+                if field.name in self.types:
+                    field = field.with_type(pa.type_for_alias(self.types[field.name]))
+                elif pa.types.is_null(field.type):
+                    field = field.with_type(pa.float64())
+                fields.append(field)
+            self.writer = pq.ParquetWriter(self.path, pa.schema(fields))
+        self.writer.write_table(table.cast(self.writer.schema))
+
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+
+def open_sink(path: str, types: dict[str, str] | None = None) -> JsonlSink | ParquetSink:
+    if path.endswith(".parquet"):
+        return ParquetSink(path, types)
+    if path.endswith((".jsonl", ".json")):
+        return JsonlSink(path)
+    raise ValueError(f"Unsupported output format for {path}, expected a .jsonl or .parquet file.")
+
+
+
+def iter_chunks(
+    data: Iterable[dict] | dict[str, Iterable],
+    chunk_size: int,
+    column_mapping: dict[str, str] | None = None,
+) -> Iterator[dict[str, list]]:
+    """
+    Yields dictionaries of metric argument name to a list of at most `chunk_size` values.
+
+    `data` is either an iterable of rows (e.g. a `datasets.IterableDataset`) whose columns are mapped to metric
+    arguments with `column_mapping`, or a dictionary of metric argument name to an iterable of values.
+    """
+    if isinstance(data, dict):
+        names = list(data)
+        rows = zip(*data.values())
+        while chunk := list(islice(rows, chunk_size)):
+            yield {name: list(values) for name, values in zip(names, zip(*chunk))}
+        return
+
+    column_mapping = column_mapping or DEFAULT_COLUMNS
+    rows = iter(data)
+    while chunk := list(islice(rows, chunk_size)):
+        columns = {name: column for name, column in column_mapping.items() if column in chunk[0]}
+        yield {name: [row[column] for row in chunk] for name, column in columns.items()}
+
+
+
+def stream_compute(
+    metric,
+    data: Iterable[dict] | dict[str, Iterable],
+    chunk_size: int = 1024,
+    output_path: str | None = None,
+    column_mapping: dict[str, str] | None = None,
+    **compute_kwargs: Any,
+) -> dict:
+    """
+    Scores `data` with `metric` one fixed-size chunk at a time, so peak memory grows with the chunk size rather than
+    with the dataset size.
+
+    Per-row scores (and Prometheus feedbacks) are appended to `output_path` (.jsonl or .parquet) as each chunk
+    finishes. Returns the running aggregates: count, nan_count, mean and nanmean.
+    """
+    if "return_feedbacks" in inspect.signature(metric._compute).parameters:
+        compute_kwargs["return_feedbacks"] = True
+
+    aggregate = RunningAggregate()
+    sink = open_sink(output_path, {"index": "int64", "feedback": "string"}) if output_path else None
+    offset = 0
+
+    try:
+        for chunk in iter_chunks(data, chunk_size, column_mapping):
+            result = metric.score(**chunk, **compute_kwargs)
+            if result is None:
+                raise ValueError(f"{type(metric).__name__} could not score the data with the given arguments.")
+
+            rows = {"index": list(range(offset, offset + len(next(iter(chunk.values())))))}
+            if compute_kwargs.get("return_feedbacks"):
+                rows["score"], rows["feedback"] = result
+            else:
+                rows["score"] = result
+
+            aggregate.update(rows["score"])
+            if sink is not None:
+                sink.write(rows)
+            offset += len(rows["index"])
+    finally:
+        if sink is not None:
+            sink.close()
+
+    return aggregate.as_dict()
+
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
@@ -0,0 +1,83 @@
+from functools import lru_cache
+import numpy as np
+
+
+
+def get_device() -> str:
+    import torch
+
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+
+@lru_cache(maxsize=None)
+def get_architectures(model_name: str) -> tuple[str, ...]:
+    from transformers import AutoConfig
+
+    model_config = AutoConfig.from_pretrained(model_name)
+    return tuple(model_config.architectures or ())
+
+
+
+def is_cross_encoder(model_name: str) -> bool:
+    return any(architecture.endswith("ForSequenceClassification") for architecture in get_architectures(model_name))
+
+
+
+def deduplicate(items: list) -> tuple[list, np.ndarray]:
+    """Returns the unique items in first-seen order and, for every input item, the index of its unique item."""
+    positions = {}
+    inverse = np.fromiter((positions.setdefault(item, len(positions)) for item in items), dtype=np.int64, count=len(items))
+    return list(positions), inverse
+
+
+
+def dedup_ratio(total: int, unique: int) -> float:
+    """Fraction of inputs that did not need their own model call."""
+    return 1 - unique / total if total else 0.0
+
+
+
+def flatten_references(references: list[str] | list[list[str]]) -> tuple[list[str], np.ndarray]:
+    """
+    Flattens one or several references per prediction into a single list and returns it with the number of
+    references of each prediction. A plain string counts as a single reference.
+    """
+    groups = [[reference] if isinstance(reference, str) else list(reference) for reference in references]
+    counts = np.fromiter(map(len, groups), dtype=np.int64, count=len(groups))
+    return [reference for group in groups for reference in group], counts
+
+
+
+def aggregate_segments(values: np.ndarray, counts: np.ndarray, aggregation: str = "max") -> np.ndarray:
+    """Reduces consecutive segments of `values` with the given lengths to one value each; empty segments give NaN."""
+    if aggregation not in ("max", "mean"):
+        raise ValueError(f"Unsupported aggregation {aggregation}, expected 'max' or 'mean'.")
+
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full(len(counts), np.nan)
+    nonempty = counts > 0
+    if values.size:
+        starts = (np.cumsum(counts) - counts)[nonempty]
+        if aggregation == "max":
+            result[nonempty] = np.maximum.reduceat(values, starts)
+        else:
+            result[nonempty] = np.add.reduceat(values, starts) / counts[nonempty]
+    return result
+
+
+
+class DirectScoring:
+    """
+    In-memory scoring for `evaluate.Metric` subclasses.
+
+    `score()` takes lists or arrays and calls `_compute` directly, skipping the Arrow cache files that `compute()`
+    writes and reads back before scoring. It accepts the same keyword arguments as `compute()`.
+    """
+
+    def score(self, predictions, references=None, **kwargs):
+        if references is not None and len(predictions) != len(references):
+            raise ValueError(f"Got {len(predictions)} predictions and {len(references)} references.")
+        if references is not None:
+            kwargs["references"] = references
+        return self._compute(predictions=predictions, **kwargs)
@@ -25,8 +25,46 @@ def test_return_average():
 
 
 
+def test_normalizers():
+    metric = Accuracy()
+    generated = ["La respuesta correcta es la B) porque...", "  canción. ", "a) París", "Va a la casa", None]
+    gold = ["b", "Cancion", "A", "a", "c"]
+
+    assert metric.compute(predictions=generated, references=gold) == [False, False, False, False, False]
+    scores = metric.compute(predictions=generated, references=gold, fold_accents=True, strip_punctuation=True, extract_option=True)
+    assert scores == [True, True, True, False, False]
+
+
+
+def test_custom_option_pattern():
+    metric = Accuracy()
+    scores = metric.compute(predictions=["Opción 3", "Opción 1"], references=["3", "2"], extract_option=r"opción (?P<option>\d)")
+
+    assert scores == [True, False]
+
+
+
+def test_score_fast_path():
+    metric = Accuracy()
+    scores, avg_score = metric.score(predictions, references, return_average=True)
+
+    assert scores == metric.compute(predictions=predictions, references=references)
+    assert avg_score == 2 / 3
+
+    try:
+        metric.score(predictions, references[:2])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("score() should reject inputs of different lengths")
+
+
+
 if __name__ == "__main__":
     test_default()
     test_return_average()
+    test_normalizers()
+    test_custom_option_pattern()
+    test_score_fast_path()
 
     print("All tests passed for Accuracy!")
@@ -0,0 +1,45 @@
+import numpy as np
+from eval_llms.batching import fixed_size_batches, padding_fraction, run_batched, token_budget_batches
+
+
+lengths = np.array([3, 120, 2, 4, 100, 5, 3, 90])
+
+
+
+def test_token_budget_batches_cover_all_rows_within_budget():
+    batches = token_budget_batches(lengths, max_tokens_per_batch=200)
+
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    assert all(len(batch) * lengths[batch].max() <= 200 for batch in batches if len(batch) > 1)
+
+
+
+def test_oversized_row_gets_its_own_batch():
+    batches = token_budget_batches(np.array([500, 3, 3]), max_tokens_per_batch=100)
+
+    assert [batch.tolist() for batch in batches] == [[0], [1, 2]]
+
+
+
+def test_padding_is_reduced():
+    fixed = padding_fraction(lengths, fixed_size_batches(len(lengths), 4))
+    budget = padding_fraction(lengths, token_budget_batches(lengths, max_tokens_per_batch=240))
+
+    assert budget < fixed
+
+
+
+def test_run_batched_restores_order():
+    outputs = run_batched(lengths, 200, lambda batch: lengths[batch] * 10)
+
+    np.testing.assert_array_equal(outputs, lengths * 10)
+
+
+
+if __name__ == "__main__":
+    test_token_budget_batches_cover_all_rows_within_budget()
+    test_oversized_row_gets_its_own_batch()
+    test_padding_is_reduced()
+    test_run_batched_restores_order()
+
+    print("All tests passed for batching!")
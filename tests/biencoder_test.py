@@ -1,3 +1,5 @@
+import numpy as np
+import pytest
 from eval_llms import BiEncoderScore
 
 
@@ -34,8 +36,92 @@ def test_return_average():
 
 
 
+def test_return_stats():
+    metric = BiEncoderScore()
+    scores, stats = metric.compute(predictions=predictions * 2, references=references * 2, return_stats=True)
+
+    assert len(scores) == 2 * len(predictions)
+    assert scores[:len(predictions)] == scores[len(predictions):]
+    assert stats["dedup_ratio"] >= 0.5
+
+
+
+def test_multi_reference(tiny_bi_encoder_path):
+    metric = BiEncoderScore()
+    multi_references = [["El sol está en el cielo.", references[0]], [references[1]], []]
+    best, best_stats = metric.score(predictions, multi_references, model_name=tiny_bi_encoder_path, return_stats=True)
+    mean = metric.score(predictions, multi_references, model_name=tiny_bi_encoder_path, reference_aggregation="mean")
+    pairs = metric.score([predictions[0]] * 2 + [predictions[1]], multi_references[0] + multi_references[1], model_name=tiny_bi_encoder_path)
+
+    np.testing.assert_allclose(best[:2], [max(pairs[:2]), pairs[2]], rtol=1e-5)
+    np.testing.assert_allclose(mean[:2], [np.mean(pairs[:2]), pairs[2]], rtol=1e-5)
+    assert np.isnan(best[2]) and np.isnan(mean[2])
+    assert best_stats["dedup_ratio"] >= 0
+
+    scores, average = metric.compute(predictions=predictions, references=multi_references, model_name=tiny_bi_encoder_path, return_average=True)
+    assert average == pytest.approx(np.mean(scores[:2]))
+
+
+
+def test_empty_input(tiny_bi_encoder_path):
+    metric = BiEncoderScore()
+
+    assert metric.score([], [], model_name=tiny_bi_encoder_path) == []
+    assert metric.score([], [], model_name=tiny_bi_encoder_path, max_tokens_per_batch=64) == []
+    scores, average = metric.score([], [], model_name=tiny_bi_encoder_path, return_average=True)
+    assert scores == [] and np.isnan(average)
+
+
+
+def test_precision(tiny_bi_encoder_path):
+    metric = BiEncoderScore()
+    baseline = metric.score(predictions, references, model_name=tiny_bi_encoder_path)
+
+    embedding_bytes = []
+    for precision, tolerance in [("float32", 1e-5), ("float16", 1e-3), ("int8", 2e-2), ("binary", None)]:
+        scores, stats = metric.score(
+            predictions, references, model_name=tiny_bi_encoder_path, precision=precision, chunk_size=2, return_stats=True
+        )
+        if tolerance is not None:
+            np.testing.assert_allclose(scores, baseline, atol=tolerance)
+        assert all(-1 <= score <= 1 for score in scores)
+        embedding_bytes.append(stats["embedding_bytes"])
+
+    assert embedding_bytes == sorted(embedding_bytes, reverse=True)
+    assert len(set(embedding_bytes)) == 4
+
+
+
+def test_embedding_cache_per_backend(tiny_bi_encoder_path, tmp_path, monkeypatch):
+    import eval_llms.biencoder as biencoder
+
+    class ConstantEncoder:
+        """Stands in for the ONNX graph: every text gets the same vector, so every pair scores 1."""
+        def encode(self, texts, batch_size=64, convert_to_numpy=True):
+            return np.ones((len(texts), 32), dtype=np.float32)
+
+    load = biencoder.load_sentence_transformer
+    monkeypatch.setattr(
+        biencoder, "load_sentence_transformer",
+        lambda model_name, device, backend="torch", quantize=False: ConstantEncoder() if backend == "onnx" else load(model_name, device)
+    )
+    metric = BiEncoderScore()
+    kwargs = dict(model_name=tiny_bi_encoder_path, embedding_cache=str(tmp_path))
+
+    torch_scores = metric.score(predictions, references, **kwargs)
+    onnx_scores = metric.score(predictions, references, **kwargs, backend="onnx", quantize=True)
+    cached_torch_scores = metric.score(predictions, references, **kwargs)
+
+    np.testing.assert_allclose(onnx_scores, 1.0, rtol=1e-6)
+    assert cached_torch_scores == torch_scores
+    assert not np.allclose(torch_scores, 1.0)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+
 if __name__ == "__main__":
     test_default()
     test_return_average()
+    test_return_stats()
 
     print("All tests passed for Bi-Encoder!")
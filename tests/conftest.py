@@ -0,0 +1,132 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+
+CHAT_TEMPLATE = "{% for message in messages %}<|{{ message['role'] }}|>{{ message['content'] }}<|end|>{% endfor %}{% if add_generation_prompt %}<|assistant|>{% endif %}"
+
+
+
+class StubJudgeServer(ThreadingHTTPServer):
+    """OpenAI-compatible /v1/completions stub returning canned Prometheus feedback."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubJudgeHandler)
+        self.requests = []
+        self.fail_next = 0
+        self.max_choices = None
+        self.responder = lambda prompt, payload: "Respuesta correcta y clara. Puntuación: 8"
+
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+
+class StubJudgeHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(payload)
+
+        if self.server.fail_next:
+            self.server.fail_next -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        prompts = payload["prompt"] if isinstance(payload["prompt"], list) else [payload["prompt"]]
+        if prompts and isinstance(prompts[0], int):
+            prompts = [prompts]
+        body = {
+            "choices": [
+                {"index": i, "text": self.server.responder(prompt, payload)} for i, prompt in enumerate(prompts)
+            ][:self.server.max_choices],
+            "usage": {"prompt_tokens": sum(len(prompt) for prompt in prompts), "completion_tokens": 10 * len(prompts)},
+        }
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+
+@pytest.fixture
+def judge_server():
+    server = StubJudgeServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+
+@pytest.fixture(scope="session")
+def chat_tokenizer_path(tmp_path_factory) -> str:
+    """Small local tokenizer with a chat template, so prompt building runs without downloading the judge."""
+    from transformers import BertTokenizerFast
+
+    path = tmp_path_factory.mktemp("chat_tokenizer")
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list("abcdefghijklmnopqrstuvwxyzáéíóúñ0123456789.,:#")
+    (path / "vocab.txt").write_text("\n".join(words))
+    tokenizer = BertTokenizerFast(vocab_file=str(path / "vocab.txt"))
+    tokenizer.chat_template = CHAT_TEMPLATE
+    tokenizer.save_pretrained(str(path))
+    return str(path)
+
+
+
+def _tiny_bert(path, **config_kwargs):
+    from transformers import BertConfig, BertTokenizerFast
+
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list("abcdefghijklmnopqrstuvwxyzáéíóúñ0123456789.,")
+    (path / "vocab.txt").write_text("\n".join(words))
+    tokenizer = BertTokenizerFast(vocab_file=str(path / "vocab.txt"))
+    config = BertConfig(
+        vocab_size=len(words), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=256, **config_kwargs
+    )
+    return tokenizer, config
+
+
+
+@pytest.fixture(scope="session")
+def tiny_bi_encoder_path(tmp_path_factory) -> str:
+    """Randomly initialized character-level sentence transformer, built locally."""
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertModel
+
+    torch.manual_seed(0)
+    path = tmp_path_factory.mktemp("tiny_bi_encoder")
+    tokenizer, config = _tiny_bert(path)
+    BertModel(config).save_pretrained(str(path / "bert"))
+    tokenizer.save_pretrained(str(path / "bert"))
+
+    transformer = models.Transformer(str(path / "bert"), max_seq_length=128)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension())
+    SentenceTransformer(modules=[transformer, pooling], device="cpu").save(str(path / "model"))
+    return str(path / "model")
+
+
+
+@pytest.fixture(scope="session")
+def tiny_cross_encoder_path(tmp_path_factory) -> str:
+    """Randomly initialized character-level cross-encoder with a single regression label, built locally."""
+    import torch
+    from transformers import BertForSequenceClassification
+
+    torch.manual_seed(0)
+    path = tmp_path_factory.mktemp("tiny_cross_encoder")
+    tokenizer, config = _tiny_bert(path, num_labels=1, architectures=["BertForSequenceClassification"])
+    BertForSequenceClassification(config).save_pretrained(str(path))
+    tokenizer.save_pretrained(str(path))
+    return str(path)
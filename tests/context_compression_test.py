@@ -0,0 +1,53 @@
+import numpy as np
+from transformers import AutoTokenizer
+from eval_llms.context_compression import chunk_spans, compress_contexts, join_chunks, select_chunks
+
+
+sentences = [
+    "el sol es una estrella.",
+    "francia es un pais europeo.",
+    "la capital de francia es paris.",
+    "el cafe es una bebida popular.",
+]
+context = " ".join(sentences)
+
+
+
+def test_chunk_spans(chat_tokenizer_path):
+    tokenizer = AutoTokenizer.from_pretrained(chat_tokenizer_path)
+    offsets = tokenizer(context, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+    lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    spans = chunk_spans(context, offsets, chunk_tokens=max(lengths) + 1)
+
+    assert "".join(context[start:end] for start, end, _ in spans) == context
+    assert [context[start:end].strip() for start, end, _ in spans] == sentences
+    assert sum(tokens for _, _, tokens in spans) == len(offsets)
+    assert all(tokens <= 3 for _, _, tokens in chunk_spans(context, offsets, chunk_tokens=3))
+
+
+
+def test_select_and_join():
+    spans = [(0, 2, 2), (2, 4, 2), (4, 6, 2), (6, 8, 2)]
+
+    assert select_chunks(np.array([0.1, 0.9, 0.5, 0.8]), [2, 2, 2, 2], 4) == [1, 3]
+    assert select_chunks(np.array([0.9, 0.1]), [5, 2], 4) == [1]
+    assert join_chunks("aabbccdd", spans, [1, 2]) == "[...]\nbbcc\n[...]"
+    assert join_chunks("aabbccdd", spans, [0, 3]) == "aa\n[...]\ndd"
+
+
+
+def test_compress_contexts(chat_tokenizer_path, tiny_bi_encoder_path):
+    tokenizer = AutoTokenizer.from_pretrained(chat_tokenizer_path)
+    lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    compressed, stats = compress_contexts(
+        [context, context, "corto."], [sentences[2], sentences[0], "corto."], tokenizer, budget=max(lengths), chunk_tokens=max(lengths),
+        model_name=tiny_bi_encoder_path
+    )
+
+    assert compressed[0] == "[...]\n" + sentences[2] + "\n[...]"
+    assert compressed[1] == sentences[0] + "\n[...]"
+    assert compressed[2] == "corto."
+    assert stats["compressed"] == 2
+    assert stats["context_tokens_saved"] == 2 * sum(lengths) - lengths[0] - lengths[2]
@@ -0,0 +1,80 @@
+import subprocess
+import sys
+import numpy as np
+from eval_llms import EmbeddingCache
+
+
+texts = [
+    "El sol brilla en el cielo.",
+    "Las bicicletas son ecológicas.",
+    "El sol brilla en el cielo. ",
+    "El café es una bebida popular."
+]
+
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, sentences, batch_size=64, convert_to_numpy=True):
+        self.encoded.extend(sentences)
+        return np.array([[len(sentence), sentence.count(" "), 1.0] for sentence in sentences], dtype=np.float32)
+
+
+
+def test_only_misses_are_encoded(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    encoder = FakeEncoder()
+
+    first = cache.encode(encoder, "fake-model", texts)
+    assert first.shape == (4, 3)
+    assert len(encoder.encoded) == 3
+    np.testing.assert_array_equal(first[0], first[2])
+
+    second = cache.encode(encoder, "fake-model", texts + ["Nuevo texto."])
+    assert encoder.encoded[3:] == ["Nuevo texto."]
+    np.testing.assert_array_equal(second[:4], first)
+
+
+
+def test_persists_across_instances(tmp_path):
+    EmbeddingCache(str(tmp_path)).encode(FakeEncoder(), "fake-model", texts)
+
+    encoder = FakeEncoder()
+    cache = EmbeddingCache(str(tmp_path))
+    embeddings = cache.encode(encoder, "fake-model", texts)
+
+    assert encoder.encoded == []
+    assert embeddings.shape == (4, 3)
+    assert cache.stats() == {"hits": 4, "misses": 0}
+
+
+
+def test_models_are_isolated(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.encode(FakeEncoder(), "org/model-a", texts)
+
+    encoder = FakeEncoder()
+    cache.encode(encoder, "org/model-b", texts)
+    assert len(encoder.encoded) == 3
+
+
+
+def test_imports_without_fcntl():
+    # fcntl does not exist on Windows; the module must still import there.
+    code = "import sys; sys.modules['fcntl'] = None; import eval_llms.embedding_cache"
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    for test in (test_only_misses_are_encoded, test_persists_across_instances, test_models_are_isolated):
+        with tempfile.TemporaryDirectory() as directory:
+            import pathlib
+            test(pathlib.Path(directory))
+    test_imports_without_fcntl()
+
+    print("All tests passed for Embedding Cache!")
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from eval_llms import BiEncoderScore
+from eval_llms.biencoder import load_sentence_transformer
+from eval_llms.encoding_pool import EncodingPool, get_encoding_pool
+
+
+texts = [f"respuesta número {i}" for i in range(23)]
+
+
+
+def test_pool_matches_in_process_encoding(tiny_bi_encoder_path):
+    pool = EncodingPool(tiny_bi_encoder_path, num_workers=2, threads_per_worker=1)
+    try:
+        embeddings = pool.encode(texts, batch_size=4)
+        expected = load_sentence_transformer(tiny_bi_encoder_path, "cpu").encode(texts, convert_to_numpy=True)
+
+        assert embeddings.shape == expected.shape
+        np.testing.assert_allclose(embeddings, expected, atol=1e-5)
+        assert pool.encode([]).shape == (0, expected.shape[1])
+    finally:
+        pool.close()
+
+
+
+def test_biencoder_reuses_pool(tiny_bi_encoder_path):
+    metric = BiEncoderScore()
+    predictions, references = texts[:10], texts[5:15]
+    expected = metric.compute(model_name=tiny_bi_encoder_path, predictions=predictions, references=references)
+
+    scores = metric.compute(model_name=tiny_bi_encoder_path, predictions=predictions, references=references, num_workers=2, threads_per_worker=1)
+    pool = get_encoding_pool(tiny_bi_encoder_path, 2, 1)
+    scores_again = metric.compute(model_name=tiny_bi_encoder_path, predictions=predictions, references=references, num_workers=2, threads_per_worker=1)
+
+    np.testing.assert_allclose(scores, expected, atol=1e-5)
+    assert scores_again == scores
+    assert get_encoding_pool(tiny_bi_encoder_path, 2, 1) is pool
+
+
+
+def test_dead_worker_raises_and_pool_is_replaced(tiny_bi_encoder_path):
+    pool = get_encoding_pool(tiny_bi_encoder_path, 2, 1)
+    pool._workers[0].kill()
+    pool._workers[0].join()
+
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        pool.encode(texts)
+
+    fresh = get_encoding_pool(tiny_bi_encoder_path, 2, 1)
+    assert fresh is not pool
+    assert fresh.encode(texts).shape[0] == len(texts)
+
+
+
+def test_stale_results_are_skipped(tiny_bi_encoder_path):
+    pool = EncodingPool(tiny_bi_encoder_path, num_workers=2, threads_per_worker=1)
+    try:
+        expected = pool.encode(texts)
+        # A result left over by an interrupted call must not be taken for one of the next call.
+        pool._results.put(("error", -1, "stale"))
+        np.testing.assert_allclose(pool.encode(texts), expected)
+    finally:
+        pool.close()
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ["vllm", "torch", "transformers", "sentence_transformers"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(statement: str) -> set[str]:
+    code = f"import json, sys\n{statement}\nprint(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")]))}
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+
+def test_accuracy_import_is_light():
+    # `evaluate` itself imports transformers (and with it torch) when they are installed, which eval_llms cannot avoid.
+    baseline = loaded_modules("import evaluate")
+    loaded = loaded_modules("from eval_llms import Accuracy")
+
+    assert "vllm" not in loaded
+    assert loaded <= baseline, f"importing Accuracy loaded {sorted(loaded - baseline)}"
+
+
+
+def test_package_import_is_lazy():
+    loaded = loaded_modules("import eval_llms; eval_llms.model_registry; eval_llms.JudgmentCache")
+
+    assert loaded == set()
+
+
+
+if __name__ == "__main__":
+    test_accuracy_import_is_light()
+    test_package_import_is_lazy()
+
+    print("All tests passed for imports!")
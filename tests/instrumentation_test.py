@@ -0,0 +1,73 @@
+import json
+import logging
+from eval_llms import Accuracy, LoggingExporter, OpenAICompatibleBackend, PrometheusScore, StageEvent, StageSummary, instrument
+from eval_llms.instrumentation import stage
+
+
+references = ["A", "B", "C"]
+predictions = ["A", "D", "C"]
+
+
+
+def test_disabled_is_noop():
+    with stage("Accuracy", "compare", rows=3) as timing:
+        timing.update(prompt_tokens=1)
+
+    assert not timing.enabled
+
+
+
+def test_stage_events():
+    events = []
+    with instrument(events.append):
+        Accuracy().score(predictions, references)
+    Accuracy().score(predictions, references)
+
+    assert [(event.metric, event.stage, event.rows) for event in events] == [("Accuracy", "normalize", 3), ("Accuracy", "compare", 3)]
+    assert all(event.seconds >= 0 for event in events)
+
+
+
+def test_event_rates():
+    event = StageEvent("PrometheusScore", "generation", 2.0, rows=4, fields={"prompt_tokens": 100, "generated_tokens": 10})
+
+    assert event.as_dict() == {
+        "metric": "PrometheusScore", "stage": "generation", "seconds": 2.0, "rows": 4, "rows_per_sec": 2.0,
+        "prompt_tokens": 100, "prompt_tokens_per_sec": 50.0, "generated_tokens": 10, "generated_tokens_per_sec": 5.0,
+    }
+
+
+
+def test_logging_exporter(caplog):
+    with caplog.at_level(logging.INFO, logger="eval_llms.instrumentation"), instrument(LoggingExporter()):
+        Accuracy().score(predictions, references)
+
+    records = [json.loads(record.getMessage()) for record in caplog.records]
+    assert [record["stage"] for record in records] == ["normalize", "compare"]
+    assert all("rows_per_sec" in record for record in records)
+
+
+
+def test_prometheus_token_counts(judge_server, chat_tokenizer_path):
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=2)
+    summary = StageSummary()
+    with instrument(summary):
+        PrometheusScore().score(
+            model_name=chat_tokenizer_path, predictions=["uno", "dos", "tres"], references=["x"] * 3, contexts=["c"] * 3, backend=backend
+        )
+
+    stages = {row["stage"]: row for row in summary.summary()}
+    assert list(stages) == ["tokenizer_load", "chat_template", "generation", "parse"]
+    assert stages["generation"]["rows"] == 3
+    assert stages["generation"]["prompt_tokens"] > 0
+    assert stages["generation"]["generated_tokens"] > 0
+    assert "generated_tokens_per_sec" in stages["generation"]
+
+
+
+if __name__ == "__main__":
+    test_disabled_is_noop()
+    test_stage_events()
+    test_event_rates()
+
+    print("All tests passed for instrumentation!")
@@ -0,0 +1,96 @@
+import time
+import pytest
+from eval_llms import OpenAICompatibleBackend, PrometheusScore
+from eval_llms.judges import JudgeBackend
+
+
+sampling_params = {"max_tokens": 16, "temperature": 0.3}
+
+
+
+def test_generate_batches_in_order(judge_server):
+    judge_server.responder = lambda prompt, payload: f"{prompt} Puntuación: 7"
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=2, max_concurrency=2)
+    outputs = backend.generate([f"prompt {i}" for i in range(5)], sampling_params)
+
+    assert [output.text for output in outputs] == [f"prompt {i} Puntuación: 7" for i in range(5)]
+    assert len(judge_server.requests) == 3
+    assert all(request["model"] == "judge" and request["max_tokens"] == 16 for request in judge_server.requests)
+    assert sum(output.generated_tokens for output in outputs) == 50
+
+
+
+def test_retries_server_errors(judge_server):
+    judge_server.fail_next = 2
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", max_retries=3, backoff=0.01)
+    outputs = backend.generate(["prompt"], sampling_params)
+
+    assert outputs[0].text.endswith("Puntuación: 8")
+    assert len(judge_server.requests) == 3
+
+
+
+def test_backoff_releases_concurrency_slot(judge_server):
+    answered = {}
+
+    def responder(prompt, payload):
+        answered[prompt] = time.perf_counter()
+        return "Respuesta correcta. Puntuación: 8"
+
+    judge_server.fail_next = 1
+    judge_server.responder = responder
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=1, max_concurrency=1, backoff=0.5)
+    start = time.perf_counter()
+    outputs = backend.generate(["uno", "dos"], sampling_params)
+
+    # The batch that failed waits at least `backoff` seconds to retry; the other one is sent meanwhile.
+    failed = judge_server.requests[0]["prompt"][0]
+    other = "dos" if failed == "uno" else "uno"
+    assert answered[other] - start < 0.5 <= answered[failed] - start
+    assert [output.text for output in outputs] == ["Respuesta correcta. Puntuación: 8"] * 2
+
+
+
+def test_choice_count_mismatch(judge_server):
+    judge_server.max_choices = 1
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=2)
+
+    with pytest.raises(RuntimeError, match="1 choices for 2 prompts"):
+        backend.generate(["uno", "dos"], sampling_params)
+
+
+
+def test_missing_aiohttp(monkeypatch):
+    import importlib.util
+
+    find_spec = importlib.util.find_spec
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name, *args: None if name == "aiohttp" else find_spec(name, *args))
+    with pytest.raises(ImportError, match="eval-llms\\[openai\\]"):
+        OpenAICompatibleBackend("http://judge:8000/v1", "judge")
+
+
+
+def test_incomplete_backend():
+    class Incomplete(JudgeBackend):
+        model_name = "judge"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+
+def test_prometheus_with_http_backend(judge_server, chat_tokenizer_path):
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=4)
+    metric = PrometheusScore()
+    scores, feedbacks = metric.compute(
+        model_name=chat_tokenizer_path,
+        predictions=["París.", "Madrid."],
+        references=["París es la capital.", "París."],
+        contexts=["Francia", "Francia"],
+        backend=backend,
+        return_feedbacks=True,
+    )
+
+    assert scores == [8, 8]
+    assert all(isinstance(feedback, str) for feedback in feedbacks)
+    assert judge_server.requests[0]["prompt"][0].startswith("<|user|>### Descripción de la Tarea")
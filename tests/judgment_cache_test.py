@@ -0,0 +1,47 @@
+import math
+from eval_llms import JudgmentCache, OpenAICompatibleBackend, PrometheusScore
+
+
+sampling_params = {"max_tokens": 1024, "temperature": 0.3}
+
+
+
+def test_key_depends_on_model_params_and_prompt():
+    key = JudgmentCache.key("judge", sampling_params, "prompt")
+
+    assert key == JudgmentCache.key("judge", dict(reversed(sampling_params.items())), "prompt")
+    assert key != JudgmentCache.key("other-judge", sampling_params, "prompt")
+    assert key != JudgmentCache.key("judge", {**sampling_params, "temperature": 0.0}, "prompt")
+    assert key != JudgmentCache.key("judge", sampling_params, "other prompt")
+
+
+
+def test_put_get_and_invalidate(tmp_path):
+    cache = JudgmentCache(str(tmp_path / "judgments.sqlite"))
+    cache.put_many("judge-a", [("k1", "Bien. Puntuación: 9", 9), ("k2", "Sin puntuación", math.nan)])
+    cache.put_many("judge-b", [("k3", "Mal. Puntuación: 2", 2)])
+
+    found = cache.get_many(["k1", "k2", "k4"])
+    assert found["k1"] == ("Bien. Puntuación: 9", 9)
+    assert math.isnan(found["k2"][1])
+    assert cache.stats() == {"hits": 2, "misses": 1, "entries": 3}
+
+    assert cache.invalidate("judge-a") == 2
+    assert len(cache) == 1
+
+
+
+def test_prometheus_skips_cached_rows(tmp_path, judge_server, chat_tokenizer_path):
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=8)
+    cache_path = str(tmp_path / "judgments.sqlite")
+    kwargs = dict(model_name=chat_tokenizer_path, references=["París."] * 3, contexts=["Francia"] * 3, backend=backend, judgment_cache=cache_path, return_stats=True)
+    metric = PrometheusScore()
+
+    scores, stats = metric.compute(predictions=["París.", "Roma.", "Lyon."], **kwargs)
+    assert stats["cache_misses"] == 3
+    assert sum(len(request["prompt"]) for request in judge_server.requests) == 3
+
+    scores_again, stats = metric.compute(predictions=["París.", "Roma.", "Madrid."], **kwargs)
+    assert stats == {"prefix_hit_ratio": None, "cache_hits": 2, "cache_misses": 1}
+    assert sum(len(request["prompt"]) for request in judge_server.requests) == 4
+    assert scores_again == scores
@@ -0,0 +1,56 @@
+import numpy as np
+from eval_llms import Accuracy, BiEncoderScore, OpenAICompatibleBackend, PrometheusScore, StageSummary, instrument, leaderboard
+
+
+references = ["A", "B", "C", "D"]
+candidates = {
+    "model-a": ["A", "B", "X", "X"],
+    "model-b": ["A", "B", "C", "D"],
+    "model-c": ["X", "X", "X", "D"],
+}
+
+
+
+def test_ranking():
+    result = leaderboard(Accuracy(), candidates, references)
+
+    assert result.ranking == ["model-b", "model-a", "model-c"]
+    assert result.scores["model-a"] == [True, True, False, False]
+    assert [row["mean"] for row in result.table] == [1.0, 0.5, 0.25]
+    assert [row["rank"] for row in result.table] == [1, 2, 3]
+
+
+
+def test_shared_references_encoded_once(tiny_bi_encoder_path):
+    texts = {name: [f"respuesta {prediction}" for prediction in predictions] for name, predictions in candidates.items()}
+    gold = [f"referencia {reference}" for reference in references]
+    summary = StageSummary()
+    with instrument(summary):
+        result = leaderboard(BiEncoderScore(), texts, gold, model_name=tiny_bi_encoder_path)
+
+    encode = next(row for row in summary.summary() if row["stage"] == "encode")
+    assert encode["calls"] == 1
+    assert encode["rows"] == len(set(gold)) + len({text for predictions in texts.values() for text in predictions})
+    for name, predictions in texts.items():
+        np.testing.assert_allclose(result.scores[name], BiEncoderScore().score(predictions, gold, model_name=tiny_bi_encoder_path), rtol=1e-5)
+
+
+
+def test_judge_contexts_are_shared(judge_server, chat_tokenizer_path):
+    judge_server.responder = lambda prompt, payload: "Puntuación: 9" if "### Respuesta del Modelo\n\nA" in prompt else "Puntuación: 2"
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=16)
+    result = leaderboard(
+        PrometheusScore(), {"good": ["A", "A"], "bad": ["B", "B"]}, ["A", "A"], model_name=chat_tokenizer_path,
+        contexts=["c1", "c2"], backend=backend
+    )
+
+    assert result.ranking == ["good", "bad"]
+    assert result.scores == {"good": [9, 9], "bad": [2, 2]}
+    assert len(judge_server.requests) == 1
+
+
+
+if __name__ == "__main__":
+    test_ranking()
+
+    print("All tests passed for leaderboard!")
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from eval_llms import BiEncoderScore, SASEnsemble, SemanticAnswerSimilarity
+
+
+pytest.importorskip("optimum.onnxruntime")
+
+
+references = [
+    "El sol brilla en el cielo.",
+    "Las bicicletas son ecológicas.",
+    "El café es una bebida popular."
+]
+
+
+predictions = [
+    "El sol está en el cielo.",
+    "Las bicicletas son buenas para el ambiente.",
+    "El café es adictivo."
+]
+
+
+
+@pytest.fixture(autouse=True)
+def onnx_cache(tmp_path, monkeypatch):
+    from eval_llms import onnx_export
+
+    monkeypatch.setattr(onnx_export, "ONNX_CACHE_DIR", str(tmp_path / "onnx"))
+
+
+
+def test_biencoder_parity(tiny_bi_encoder_path):
+    metric = BiEncoderScore()
+    kwargs = dict(predictions=predictions, references=references, model_name=tiny_bi_encoder_path)
+    torch_scores = metric.compute(**kwargs)
+    onnx_scores = metric.compute(**kwargs, backend="onnx")
+    int8_scores = metric.compute(**kwargs, backend="onnx", quantize=True)
+
+    np.testing.assert_allclose(onnx_scores, torch_scores, atol=1e-4)
+    np.testing.assert_allclose(int8_scores, torch_scores, atol=5e-2)
+
+
+
+def test_embedding_cache_per_backend(tiny_bi_encoder_path, tmp_path):
+    metric = BiEncoderScore()
+    cache_dir = str(tmp_path / "embeddings")
+    kwargs = dict(predictions=predictions, references=references, model_name=tiny_bi_encoder_path)
+    torch_scores = metric.compute(**kwargs, embedding_cache=cache_dir)
+    int8_scores = metric.compute(**kwargs, embedding_cache=cache_dir, backend="onnx", quantize=True)
+    uncached_int8_scores = metric.compute(**kwargs, backend="onnx", quantize=True)
+
+    np.testing.assert_allclose(int8_scores, uncached_int8_scores, rtol=1e-6)
+    assert metric.compute(**kwargs, embedding_cache=cache_dir) == torch_scores
+    assert len(list((tmp_path / "embeddings").iterdir())) == 2
+
+
+
+def test_sas_parity(tiny_cross_encoder_path):
+    metric = SemanticAnswerSimilarity()
+    kwargs = dict(predictions=predictions, references=references, model_name=tiny_cross_encoder_path)
+    torch_scores = metric.compute(**kwargs)
+    onnx_scores = metric.compute(**kwargs, backend="onnx")
+    int8_scores = metric.compute(**kwargs, backend="onnx", quantize=True)
+
+    np.testing.assert_allclose(onnx_scores, torch_scores, atol=1e-4)
+    np.testing.assert_allclose(int8_scores, torch_scores, atol=5e-2)
+
+
+
+def test_ensemble_parity(tiny_bi_encoder_path, tiny_cross_encoder_path):
+    model_names = [tiny_bi_encoder_path, tiny_cross_encoder_path]
+    metric = SASEnsemble()
+    torch_scores = metric.compute(model_names=model_names, predictions=predictions, references=references)
+    onnx_scores = metric.compute(model_names=model_names, predictions=predictions, references=references, backend="onnx")
+
+    np.testing.assert_allclose(onnx_scores, torch_scores, atol=1e-4)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from eval_llms.precision import CompactEmbeddings
+
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.einsum("ij,ij->i", a, b) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+
+def test_pair_similarity():
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(64, 32)).astype(np.float32)
+    left, right = np.arange(32), np.arange(32, 64)
+    expected = cosine(embeddings[:32], embeddings[32:])
+
+    for precision, tolerance in [("float32", 1e-6), ("float16", 1e-3), ("int8", 2e-2)]:
+        compact = CompactEmbeddings(64, precision)
+        compact.set(0, embeddings[:40])
+        compact.set(40, embeddings[40:])
+        np.testing.assert_allclose(compact.pair_similarity(left, right, chunk_size=7), expected, atol=tolerance)
+
+
+
+def test_binary():
+    embeddings = np.array([[1.0, -2.0, 3.0, 0.5, -1.0], [2.0, -1.0, 1.0, 1.0, -3.0], [-1.0, 2.0, -3.0, -0.5, 1.0]], dtype=np.float32)
+    compact = CompactEmbeddings(3, "binary")
+    compact.set(0, embeddings)
+
+    np.testing.assert_allclose(compact.pair_similarity(np.array([0, 0]), np.array([1, 2])), [1.0, -1.0], atol=1e-6)
+    assert compact.nbytes == 3
+
+
+
+def test_nbytes():
+    sizes = {}
+    for precision in ["float32", "float16", "int8", "binary"]:
+        compact = CompactEmbeddings(10, precision)
+        compact.set(0, np.ones((10, 64), dtype=np.float32))
+        sizes[precision] = compact.nbytes
+
+    assert sizes == {"float32": 2560, "float16": 1280, "int8": 680, "binary": 80}
+
+
+
+def test_unsupported_precision():
+    with pytest.raises(ValueError):
+        CompactEmbeddings(10, "int4")
@@ -1,4 +1,7 @@
-from eval_llms import PrometheusScore
+import pytest
+from eval_llms import OpenAICompatibleBackend, PrometheusScore
+from eval_llms.judges import Generation
+from eval_llms.prometheus import prefix_hit_ratio
 
 
 model_name = "meta-llama/Llama-3.1-8B-Instruct"
@@ -89,11 +92,208 @@ def test_return_all():
 
 
 
+def test_prefix_caching_order(judge_server, chat_tokenizer_path):
+    judge_server.responder = lambda prompt, payload: f"{prompt.split('### Respuesta del Modelo')[1][:12]} Puntuación: 5"
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=1, max_concurrency=1)
+    metric = PrometheusScore()
+    shuffled_contexts = ["B", "A", "B", "A"]
+    scores, feedbacks, stats = metric.compute(
+        model_name=chat_tokenizer_path,
+        predictions=["uno", "dos", "tres", "cuatro"],
+        references=["x"] * 4,
+        contexts=shuffled_contexts,
+        backend=backend,
+        prefix_caching=True,
+        return_feedbacks=True,
+        return_stats=True
+    )
+
+    submitted_contexts = [request["prompt"][0].split("(contextos informativos)")[1][:5].strip() for request in judge_server.requests]
+    assert submitted_contexts == sorted(shuffled_contexts)
+    assert [feedback.split()[0] for feedback in feedbacks] == ["uno", "dos", "tres", "cuatro"]
+    assert scores == [5, 5, 5, 5]
+    assert stats["prefix_hit_ratio"] is None
+
+
+
+def test_default_engine_shared_across_prefix_caching(judge_server, chat_tokenizer_path, monkeypatch):
+    from eval_llms import prometheus
+
+    engines = []
+
+    class RecordingBackend(OpenAICompatibleBackend):
+        def __init__(self, model_name, **engine_kwargs):
+            engines.append(engine_kwargs)
+            super().__init__(judge_server.base_url, "judge")
+
+    judge_server.responder = lambda prompt, payload: "Bien. Puntuación: 5"
+    monkeypatch.setattr(prometheus, "VLLMBackend", RecordingBackend)
+    metric = PrometheusScore()
+    for prefix_caching in (False, True):
+        scores = metric.compute(
+            model_name=chat_tokenizer_path, predictions=["uno"], references=["x"], contexts=["A"], prefix_caching=prefix_caching
+        )
+        assert scores == [5]
+
+    assert engines[0] == engines[1]
+
+
+
+def test_prefix_hit_ratio():
+    outputs = [Generation("a", prompt_tokens=100, cached_tokens=0), Generation("b", prompt_tokens=100, cached_tokens=80)]
+
+    assert prefix_hit_ratio(outputs) == 0.4
+    assert prefix_hit_ratio([Generation("a", prompt_tokens=100)]) is None
+
+
+
+def test_repair_unparseable_rows(judge_server, chat_tokenizer_path):
+    attempts = {}
+
+    def responder(prompt, payload):
+        if prompt.endswith("Puntuación: "):
+            return "6" if "Lyon" in prompt else "sin número"
+        for city in ("Roma", "Lyon", "Oslo"):
+            if city in prompt:
+                attempts[city] = attempts.get(city, 0) + 1
+                if city == "Roma" and attempts[city] > 1:
+                    return "Respuesta incorrecta. Puntuación: 2"
+                return "Feedback sin puntuación."
+        return "Respuesta correcta. Puntuación: 9"
+
+    judge_server.responder = responder
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=8)
+    metric = PrometheusScore()
+    scores, stats = metric.compute(
+        model_name=chat_tokenizer_path,
+        predictions=["París.", "Roma.", "Lyon.", "Oslo."],
+        references=["París."] * 4,
+        contexts=["Francia"] * 4,
+        backend=backend,
+        repair_retries=2,
+        force_score=True,
+        return_stats=True
+    )
+
+    assert scores[:3] == [9, 2, 6]
+    assert scores[3] != scores[3]
+    assert attempts == {"Roma": 2, "Lyon": 3, "Oslo": 3}
+    assert stats["repaired"] == 2
+    assert stats["unparseable"] == 1
+
+
+
+def test_partial_repair_sampling_params(judge_server, chat_tokenizer_path):
+    judge_server.responder = lambda prompt, payload: "Feedback sin puntuación."
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge")
+    metric = PrometheusScore()
+    metric.compute(
+        model_name=chat_tokenizer_path, predictions=["París."], references=["París."], contexts=["Francia"], backend=backend,
+        repair_retries=1, repair_sampling_params={"temperature": 0.7}
+    )
+
+    repair = judge_server.requests[1]
+    assert repair["temperature"] == 0.7
+    assert repair["max_tokens"] == 1024
+    assert repair["stop"] == ["<|eot_id|>", "<|im_end|>"]
+
+
+
+def test_resume_from_checkpoints(judge_server, chat_tokenizer_path, tmp_path):
+    crash = {"enabled": True}
+
+    def responder(prompt, payload):
+        if crash["enabled"] and "cuatro" in prompt:
+            raise RuntimeError("judge preempted")
+        return f"{prompt.split('### Respuesta del Modelo')[1][:12]} Puntuación: 7"
+
+    judge_server.responder = responder
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=1, max_concurrency=1, max_retries=0)
+    metric = PrometheusScore()
+    rows = ["uno", "dos", "tres", "cuatro", "cinco"]
+    kwargs = dict(
+        model_name=chat_tokenizer_path, predictions=rows, references=["x"] * 5, contexts=["c"] * 5, backend=backend,
+        run_dir=str(tmp_path / "run"), shard_size=2
+    )
+
+    with pytest.raises(Exception):
+        metric.score(**kwargs)
+    assert sorted(path.name for path in (tmp_path / "run" / "shards").iterdir()) == ["shard-00000.json"]
+
+    crash["enabled"] = False
+    judge_server.requests.clear()
+    scores, feedbacks, stats = metric.score(**kwargs, return_feedbacks=True, return_stats=True)
+
+    assert scores == [7] * 5
+    assert [feedback.split()[0] for feedback in feedbacks] == rows
+    assert len(judge_server.requests) == 3
+    assert stats["resumed_shards"] == 1
+    assert stats["shards"] == 3
+
+    with pytest.raises(ValueError):
+        metric.score(**{**kwargs, "predictions": rows[::-1]})
+
+
+
+def test_pretokenized_prompts(judge_server, chat_tokenizer_path):
+    from transformers import AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(chat_tokenizer_path)
+    forced = tokenizer("\nPuntuación: ", add_special_tokens=False)["input_ids"]
+
+    def responder(prompt, payload):
+        if prompt.endswith("Puntuación: ") if isinstance(prompt, str) else prompt[-len(forced):] == forced:
+            return "4"
+        return "Sin puntuación."
+
+    judge_server.responder = responder
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=8)
+    metric = PrometheusScore()
+    kwargs = dict(model_name=chat_tokenizer_path, predictions=["paris."] * 2, references=["paris."] * 2, contexts=["francia"] * 2, backend=backend)
+
+    text_scores = metric.score(**kwargs, force_score=True)
+    text_prompts = [request["prompt"] for request in judge_server.requests]
+    judge_server.requests.clear()
+    scores, stats = metric.score(**kwargs, force_score=True, pretokenize=True, return_stats=True)
+
+    assert scores == text_scores == [4, 4]
+    assert judge_server.requests[0]["prompt"] == tokenizer(text_prompts[0], add_special_tokens=False)["input_ids"]
+    assert "truncated" not in stats
+
+    budget = len(judge_server.requests[0]["prompt"][0]) + 50
+    judge_server.requests.clear()
+    long_contexts = ["francia " * 200, "francia"]
+    scores, stats = metric.score(**{**kwargs, "contexts": long_contexts}, pretokenize=True, max_prompt_tokens=budget, return_stats=True)
+    assert stats["truncated"] == 1
+    assert [len(prompt) for prompt in judge_server.requests[0]["prompt"]] == [budget, budget - 50]
+
+
+
+def test_context_compression(judge_server, chat_tokenizer_path, tiny_bi_encoder_path):
+    backend = OpenAICompatibleBackend(judge_server.base_url, "judge", batch_size=8)
+    metric = PrometheusScore()
+    sentences = ["el sol es una estrella.", "francia es un pais europeo.", "la capital de francia es paris.", "el cafe es popular."]
+
+    scores, stats = metric.score(
+        model_name=chat_tokenizer_path, predictions=[sentences[2]], references=["paris."], contexts=[" ".join(sentences)],
+        backend=backend, context_budget=7, chunk_tokens=7, compression_model=tiny_bi_encoder_path, return_stats=True
+    )
+
+    prompt = judge_server.requests[0]["prompt"][0]
+    context = prompt.split("(contextos informativos)")[1].split("###")[0].strip()
+    assert context == "[...]\n" + sentences[2] + "\n[...]"
+    assert scores == [8]
+    assert stats["compressed"] == 1
+    assert stats["context_tokens_saved"] > 0
+
+
+
 if __name__ == "__main__":
     test_default()
     test_no_previous_conversation()
     test_return_average()
     test_return_feedbacks()
     test_return_all()
+    test_prefix_hit_ratio()
 
     print("All tests passed for Prometheus Score!")
\ No newline at end of file
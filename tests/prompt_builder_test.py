@@ -0,0 +1,79 @@
+from transformers import AutoTokenizer
+from eval_llms.prometheus import template
+from eval_llms.prompt_builder import PromptBuilder, share_budget
+
+
+values = {
+    "context": ["el sol emite luz y calor.", "francia es un pais europeo cuya capital es paris."],
+    "previous_conversation": ["usuario: que es el sol?", "usuario: hola\nasistente: hola\nusuario: y francia?"],
+    "prediction": ["el sol brilla.", "paris."],
+    "reference": ["el sol produce luz.", "paris es la capital."],
+}
+
+
+
+def rendered(tokenizer) -> list[str]:
+    return [
+        tokenizer.apply_chat_template(
+            [{"role": "user", "content": template.format(**{name: column[i] for name, column in values.items()})}],
+            tokenize=False,
+            add_generation_prompt=True,
+        )
+        for i in range(2)
+    ]
+
+
+
+def test_share_budget():
+    assert share_budget([10, 2], 8) == [6, 2]
+    assert share_budget([10, 10], 9) == [4, 5]
+    assert share_budget([3, 4], 20) == [3, 4]
+    assert share_budget([5, 5], -3) == [0, 0]
+
+
+
+def test_build_matches_chat_template(chat_tokenizer_path):
+    tokenizer = AutoTokenizer.from_pretrained(chat_tokenizer_path)
+    builder = PromptBuilder(tokenizer, template)
+    expected = rendered(tokenizer)
+
+    prompts, truncated = builder.build(values)
+    token_prompts, _ = builder.build(values, pretokenize=True)
+
+    assert builder.segments is not None
+    assert prompts == expected
+    assert token_prompts == tokenizer(expected, add_special_tokens=False)["input_ids"]
+    assert truncated == 0
+
+
+
+def test_fallback_chat_template(chat_tokenizer_path):
+    tokenizer = AutoTokenizer.from_pretrained(chat_tokenizer_path)
+    tokenizer.chat_template = "{% for message in messages %}{{ message['content'] | replace('<', '[') }}{% endfor %}"
+    builder = PromptBuilder(tokenizer, template)
+
+    prompts, _ = builder.build(values)
+
+    assert builder.segments is None
+    assert prompts == rendered(tokenizer)
+
+
+
+def test_max_prompt_tokens(chat_tokenizer_path):
+    tokenizer = AutoTokenizer.from_pretrained(chat_tokenizer_path)
+    builder = PromptBuilder(tokenizer, template)
+    truncatable = {"context": "head", "previous_conversation": "tail"}
+    lengths = {name: [len(ids) for ids in builder.tokenize(column)] for name, column in values.items()}
+    budget = builder.fixed_tokens + lengths["prediction"][1] + lengths["reference"][1] + 20
+
+    prompts, truncated = builder.build(values, pretokenize=True, max_prompt_tokens=budget, truncatable=truncatable)
+    context, conversation = builder.tokenize([values["context"][1], values["previous_conversation"][1]])
+
+    assert truncated == 1
+    assert prompts[0] == builder.build(values, pretokenize=True)[0][0]
+    assert len(prompts[1]) == budget
+    # The remaining 20 tokens are shared: the first 10 of the context and the last 10 of the conversation.
+    context_start = len(builder.segment_ids[0])
+    conversation_start = context_start + 10 + len(builder.segment_ids[1])
+    assert prompts[1][context_start:context_start + 10] == context[:10]
+    assert prompts[1][conversation_start:conversation_start + 10] == conversation[-10:]
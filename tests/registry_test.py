@@ -0,0 +1,95 @@
+import threading
+import time
+from eval_llms import ModelRegistry
+
+
+
+class FakeModel:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+
+def test_hit_and_miss():
+    registry = ModelRegistry()
+    first = registry.get("model-a", lambda: FakeModel("model-a"), size_fn=lambda model: 10)
+    second = registry.get("model-a", lambda: FakeModel("model-a"), size_fn=lambda model: 10)
+
+    assert first is second
+    assert registry.stats()["hits"] == 1
+    assert registry.stats()["misses"] == 1
+
+
+
+def test_key_includes_device_dtype_backend():
+    registry = ModelRegistry()
+    cpu = registry.get("model-a", lambda: FakeModel("cpu"), device="cpu")
+    cuda = registry.get("model-a", lambda: FakeModel("cuda"), device="cuda")
+    half = registry.get("model-a", lambda: FakeModel("half"), device="cpu", dtype="float16")
+    onnx = registry.get("model-a", lambda: FakeModel("onnx"), device="cpu", backend="onnx")
+
+    assert len({id(cpu), id(cuda), id(half), id(onnx)}) == 4
+    assert registry.stats()["misses"] == 4
+
+
+
+def test_lru_eviction():
+    registry = ModelRegistry(max_memory_bytes=25)
+    model_a = registry.get("model-a", lambda: FakeModel("model-a"), size_fn=lambda model: 10)
+    registry.get("model-b", lambda: FakeModel("model-b"), size_fn=lambda model: 10)
+    registry.get("model-a", lambda: FakeModel("model-a"), size_fn=lambda model: 10)
+    registry.get("model-c", lambda: FakeModel("model-c"), size_fn=lambda model: 10)
+
+    names = [key.model_name for key in registry.keys()]
+    assert names == ["model-a", "model-c"]
+    assert registry.stats()["evictions"] == 1
+    assert registry.stats()["memory_bytes"] == 20
+    assert not model_a.closed
+
+
+
+def test_shrinking_budget_evicts_and_closes():
+    registry = ModelRegistry()
+    model_a = registry.get("model-a", lambda: FakeModel("model-a"), size_fn=lambda model: 10)
+    registry.get("model-b", lambda: FakeModel("model-b"), size_fn=lambda model: 10)
+    registry.max_memory_bytes = 10
+
+    assert model_a.closed
+    assert registry.stats()["models"] == 1
+
+
+
+def test_concurrent_get_loads_once():
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return FakeModel("model-a")
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("model-a", loader))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert registry.stats()["hits"] == 7
+
+
+
+if __name__ == "__main__":
+    test_hit_and_miss()
+    test_key_includes_device_dtype_backend()
+    test_lru_eviction()
+    test_shrinking_budget_evicts_and_closes()
+    test_concurrent_get_loads_once()
+
+    print("All tests passed for Model Registry!")
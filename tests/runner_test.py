@@ -0,0 +1,69 @@
+import json
+import pyarrow.parquet as pq
+from eval_llms import StageSummary, instrument, run_metrics
+from eval_llms.cli import main
+from eval_llms.runner import plan_models
+
+
+rows = [
+    {"prediction": "el sol brilla", "reference": "el sol brilla", "context": "cielo"},
+    {"prediction": "A", "reference": "a", "context": "letras"},
+    {"prediction": "café", "reference": "una bebida", "context": "bebidas"},
+]
+
+
+
+def test_plan_shares_models(tiny_bi_encoder_path, tiny_cross_encoder_path):
+    plan = plan_models(
+        ["bi_encoder", "sas", "sas_ensemble"], tiny_bi_encoder_path, tiny_cross_encoder_path,
+        ensemble=[tiny_bi_encoder_path, tiny_cross_encoder_path]
+    )
+
+    assert plan == {tiny_bi_encoder_path: False, tiny_cross_encoder_path: True}
+
+
+
+def test_single_pass(tiny_bi_encoder_path, tiny_cross_encoder_path):
+    data = {"predictions": [row["prediction"] for row in rows], "references": [row["reference"] for row in rows]}
+    summary = StageSummary()
+    with instrument(summary):
+        results = run_metrics(
+            data, metrics=["accuracy", "bi_encoder", "sas", "sas_ensemble"], bi_encoder=tiny_bi_encoder_path,
+            cross_encoder=tiny_cross_encoder_path, ensemble=[tiny_bi_encoder_path, tiny_cross_encoder_path], ensemble_weights=[3, 1]
+        )
+
+    calls = {(row["metric"], row["stage"]): row["calls"] for row in summary.summary()}
+    assert calls[("BiEncoderScore", "encode")] == 1
+    assert calls[("SemanticAnswerSimilarity", "predict")] == 1
+    assert results["accuracy"] == [True, True, False]
+    expected = [(3 * bi + sas) / 4 for bi, sas in zip(results["bi_encoder"], results["sas"])]
+    assert all(abs(score - value) < 1e-6 for score, value in zip(results["sas_ensemble"], expected))
+
+
+
+def test_default_metrics(tiny_bi_encoder_path, tiny_cross_encoder_path):
+    data = {"predictions": [row["prediction"] for row in rows], "references": [row["reference"] for row in rows]}
+    results = run_metrics(
+        data, bi_encoder=tiny_bi_encoder_path, cross_encoder=tiny_cross_encoder_path,
+        ensemble=[tiny_bi_encoder_path, tiny_cross_encoder_path]
+    )
+
+    assert list(results) == ["predictions", "references", "accuracy", "bi_encoder", "sas", "sas_ensemble"]
+
+
+
+def test_cli(tmp_path, tiny_bi_encoder_path, judge_server, chat_tokenizer_path, capsys):
+    input_path = tmp_path / "eval.jsonl"
+    input_path.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows))
+    output_path = tmp_path / "scores.parquet"
+
+    main([
+        str(input_path), "--output", str(output_path), "--metrics", "accuracy", "bi_encoder", "prometheus",
+        "--bi-encoder", tiny_bi_encoder_path, "--judge", chat_tokenizer_path, "--judge-url", judge_server.base_url,
+    ])
+
+    table = pq.read_table(output_path).to_pydict()
+    assert table["prediction"] == [row["prediction"] for row in rows]
+    assert table["prometheus"] == [8, 8, 8]
+    assert len(table["bi_encoder"]) == len(table["prometheus_feedback"]) == 3
+    assert json.loads(capsys.readouterr().out)["accuracy"] == 2 / 3
@@ -1,4 +1,7 @@
+import numpy as np
+import pytest
 from eval_llms import SASEnsemble
+from eval_llms.sas_ensemble import fit_calibration
 
 
 model_names = [
@@ -42,8 +45,71 @@ def test_return_average():
 
 
 
+def test_member_scores_and_weights():
+    metric = SASEnsemble()
+    scores, member_scores = metric.compute(model_names=model_names, predictions=predictions, references=references, weights=[3, 1], return_member_scores=True)
+
+    assert isinstance(member_scores, np.ndarray)
+    assert member_scores.shape == (len(model_names), len(predictions))
+    np.testing.assert_allclose(scores, (3 * member_scores[0] + member_scores[1]) / 4)
+
+
+
+def test_cascade(tiny_bi_encoder_path, tiny_cross_encoder_path):
+    metric = SASEnsemble()
+    tiny_models = [tiny_bi_encoder_path, tiny_cross_encoder_path]
+    cascade_predictions = predictions * 10
+    cascade_references = references[::-1] * 10
+    full_scores, full_member_scores = metric.score(cascade_predictions, cascade_references, model_names=tiny_models, return_member_scores=True)
+
+    scores, stats = metric.score(cascade_predictions, cascade_references, model_names=tiny_models, cascade_band=(-2, 2), return_stats=True)
+    assert stats["short_circuit_ratio"] == 0
+    np.testing.assert_allclose(scores, full_scores, atol=1e-6)
+
+    scores, member_scores, stats = metric.score(
+        cascade_predictions, cascade_references, model_names=tiny_models, cascade_band=(2, 3), calibration_size=6,
+        return_member_scores=True, return_stats=True
+    )
+    assert stats["short_circuit_ratio"] == 0.8
+    np.testing.assert_allclose(member_scores[0], full_member_scores[0], atol=1e-6)
+    assert member_scores[1].min() >= full_member_scores[1].min() - 1e-6
+    assert member_scores[1].max() <= full_member_scores[1].max() + 1e-6
+
+
+
+def test_fit_calibration():
+    np.testing.assert_allclose(fit_calibration(np.array([0.0, 0.5, 1.0]), np.array([1.0, 2.0, 3.0])), (2.0, 1.0))
+    assert fit_calibration(np.array([0.5, 0.5]), np.array([1.0, 2.0])) == (1.0, 0.0)
+    np.testing.assert_allclose(fit_calibration(np.array([0.0, np.nan, 1.0, 0.5]), np.array([1.0, 5.0, 3.0, np.nan])), (2.0, 1.0))
+
+
+
+def test_cascade_empty_references(tiny_bi_encoder_path, tiny_cross_encoder_path):
+    metric = SASEnsemble()
+    tiny_models = [tiny_bi_encoder_path, tiny_cross_encoder_path]
+    multi_references = [[reference] for reference in references] * 4 + [[]] * 3
+
+    scores, member_scores, stats = metric.score(
+        predictions * 5, multi_references, model_names=tiny_models, cascade_band=(0.9, 0.95), return_member_scores=True, return_stats=True
+    )
+
+    assert np.isnan(scores[-3:]).all()
+    assert np.isnan(member_scores[:, -3:]).all()
+    assert np.isfinite(scores[:-3]).all()
+    assert stats["short_circuit_ratio"] <= 12 / 15
+
+    scores, average = metric.compute(
+        predictions=predictions, references=[[references[0]], [references[1]], []], model_names=tiny_models, return_average=True
+    )
+    assert np.isnan(scores[2])
+    assert average == pytest.approx(np.mean(scores[:2]))
+
+
+
 if __name__ == "__main__":
     test_default()
     test_return_average()
+    test_member_scores_and_weights()
+    test_fit_calibration()
 
     print("All tests passed for SAS Ensemble!")
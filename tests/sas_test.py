@@ -1,3 +1,5 @@
+import numpy as np
+import pytest
 from eval_llms import SemanticAnswerSimilarity
 
 
@@ -44,9 +46,46 @@ def test_invalid_model():
 
 
 
+def test_return_stats():
+    metric = SemanticAnswerSimilarity()
+    scores, stats = metric.compute(predictions=predictions * 2, references=references * 2, return_stats=True)
+
+    assert len(scores) == 2 * len(predictions)
+    assert scores[:len(predictions)] == scores[len(predictions):]
+    assert stats["dedup_ratio"] >= 0.5
+
+
+
+def test_multi_reference(tiny_cross_encoder_path):
+    metric = SemanticAnswerSimilarity()
+    multi_references = [["El sol está en el cielo.", references[0]], [references[1]], []]
+    best, best_stats = metric.score(predictions, multi_references, model_name=tiny_cross_encoder_path, return_stats=True)
+    mean = metric.score(predictions, multi_references, model_name=tiny_cross_encoder_path, reference_aggregation="mean")
+    pairs = metric.score([predictions[0]] * 2 + [predictions[1]], multi_references[0] + multi_references[1], model_name=tiny_cross_encoder_path)
+
+    np.testing.assert_allclose(best[:2], [max(pairs[:2]), pairs[2]], rtol=1e-5)
+    np.testing.assert_allclose(mean[:2], [np.mean(pairs[:2]), pairs[2]], rtol=1e-5)
+    assert np.isnan(best[2]) and np.isnan(mean[2])
+    assert best_stats["dedup_ratio"] >= 0
+
+    scores, average = metric.compute(predictions=predictions, references=multi_references, model_name=tiny_cross_encoder_path, return_average=True)
+    assert average == pytest.approx(np.mean(scores[:2]))
+
+
+
+def test_max_tokens_per_batch(tiny_cross_encoder_path):
+    metric = SemanticAnswerSimilarity()
+    scores = metric.score(predictions, references, model_name=tiny_cross_encoder_path)
+    budget_scores = metric.score(predictions, references, model_name=tiny_cross_encoder_path, max_tokens_per_batch=64)
+
+    np.testing.assert_allclose(budget_scores, scores, rtol=1e-5)
+
+
+
 if __name__ == "__main__":
     test_default()
     test_return_average()
+    test_return_stats()
     test_invalid_model()
 
     print("All tests passed for Semantic Answer Similarity!")
@@ -0,0 +1,88 @@
+import json
+import math
+import pyarrow.parquet as pq
+from eval_llms import Accuracy, OpenAICompatibleBackend, PrometheusScore, RunningAggregate, stream_compute
+from eval_llms.streaming import ParquetSink
+
+
+def rows():
+    for i in range(10):
+        yield {"prediction": "A" if i % 2 else "B", "reference": "A", "id": i}
+
+
+
+def test_running_aggregate():
+    aggregate = RunningAggregate()
+    aggregate.update([1.0, 2.0])
+    aggregate.update([math.nan, 3.0])
+
+    assert aggregate.count == 4
+    assert aggregate.nan_count == 1
+    assert math.isnan(aggregate.mean)
+    assert aggregate.nanmean == 2.0
+
+
+
+def test_stream_rows_to_jsonl(tmp_path):
+    output_path = str(tmp_path / "scores.jsonl")
+    result = stream_compute(Accuracy(), rows(), chunk_size=3, output_path=output_path)
+
+    assert result["count"] == 10
+    assert result["mean"] == 0.5
+
+    with open(output_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record["index"] for record in records] == list(range(10))
+    assert [record["score"] for record in records] == [bool(i % 2) for i in range(10)]
+
+
+
+def test_stream_columns_to_parquet(tmp_path):
+    output_path = str(tmp_path / "scores.parquet")
+    data = {"predictions": iter(["A", "B", "C"]), "references": iter(["a", "b", "d"])}
+    result = stream_compute(Accuracy(), data, chunk_size=2, output_path=output_path)
+
+    assert result["count"] == 3
+    assert pq.read_table(output_path).column("score").to_pylist() == [True, True, False]
+
+
+
+def test_parquet_sink_all_nan_first_chunk(tmp_path):
+    output_path = str(tmp_path / "scores.parquet")
+    sink = ParquetSink(output_path, {"index": "int64"})
+    sink.write({"index": [0, 1], "score": [math.nan, math.nan]})
+    sink.write({"index": [2, 3], "score": [7.0, math.nan]})
+    sink.close()
+
+    table = pq.read_table(output_path)
+    assert str(table.schema.field("score").type) == "double"
+    assert table.column("score").to_pylist() == [None, None, 7.0, None]
+
+
+
+def test_stream_unparseable_first_chunk_to_parquet(tmp_path, judge_server, chat_tokenizer_path):
+    judge_server.responder = lambda prompt, payload: "Sin puntuación." if "malo" in prompt else "Bien. Puntuación: 8"
+    output_path = str(tmp_path / "scores.parquet")
+    data = {"predictions": iter(["malo", "malo", "bueno"]), "references": iter(["x"] * 3), "contexts": iter(["c"] * 3)}
+    result = stream_compute(
+        PrometheusScore(), data, chunk_size=2, output_path=output_path, model_name=chat_tokenizer_path,
+        backend=OpenAICompatibleBackend(judge_server.base_url, "judge")
+    )
+
+    table = pq.read_table(output_path)
+    assert result["nan_count"] == 2
+    assert table.column("score").to_pylist() == [None, None, 8]
+    assert table.column("index").to_pylist() == [0, 1, 2]
+
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+
+    test_running_aggregate()
+    with tempfile.TemporaryDirectory() as directory:
+        test_stream_rows_to_jsonl(pathlib.Path(directory))
+        test_stream_columns_to_parquet(pathlib.Path(directory))
+
+    print("All tests passed for streaming!")
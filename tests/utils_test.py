@@ -0,0 +1,53 @@
+import numpy as np
+from eval_llms.utils import aggregate_segments, dedup_ratio, deduplicate, flatten_references
+
+
+
+def test_deduplicate():
+    unique, inverse = deduplicate(["b", "a", "b", "c", "a"])
+
+    assert unique == ["b", "a", "c"]
+    assert inverse.tolist() == [0, 1, 0, 2, 1]
+    assert [unique[i] for i in inverse] == ["b", "a", "b", "c", "a"]
+
+
+
+def test_deduplicate_pairs():
+    unique, inverse = deduplicate([("a", "x"), ("a", "y"), ("a", "x")])
+
+    assert unique == [("a", "x"), ("a", "y")]
+    assert inverse.tolist() == [0, 1, 0]
+
+
+
+def test_dedup_ratio():
+    assert dedup_ratio(4, 1) == 0.75
+    assert dedup_ratio(0, 0) == 0.0
+
+
+
+def test_flatten_references():
+    flat, counts = flatten_references([["a", "b"], "c", []])
+
+    assert flat == ["a", "b", "c"]
+    assert counts.tolist() == [2, 1, 0]
+
+
+
+def test_aggregate_segments():
+    values = np.array([0.2, 0.8, 0.5])
+    counts = np.array([2, 1, 0])
+
+    np.testing.assert_allclose(aggregate_segments(values, counts, "max"), [0.8, 0.5, np.nan])
+    np.testing.assert_allclose(aggregate_segments(values, counts, "mean"), [0.5, 0.5, np.nan])
+
+
+
+if __name__ == "__main__":
+    test_deduplicate()
+    test_deduplicate_pairs()
+    test_dedup_ratio()
+    test_flatten_references()
+    test_aggregate_segments()
+
+    print("All tests passed for utils!")